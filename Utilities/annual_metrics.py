@@ -0,0 +1,93 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+
+# Create the schema of the annual metrics that are pulled for each year ending
+# Each metric has its ESPM metric name, the label used in the report and the units used if ESPM does not return them
+ANNUAL_METRICS = [
+    ('score', 'ENERGY STAR Score', ''),
+    ('sourceTotalWN', 'Weather Normalized Source Energy Use', 'kBtu'),
+    ('sourceIntensityWN', 'Weather Normalized Source Energy Use Intensity', 'kBtu/ft²'),
+    ('medianSourceTotal', 'National Median Source Energy Use', 'kBtu'),
+    ('medianSourceIntensity', 'National Median Source Energy Use Intensity', 'kBtu/ft²'),
+    ('waterScore', 'Water Score (Multifamily Only)', ''),
+    ('waterUseTotal', 'Total Water Use', 'kgal'),
+    ('waterIntensityTotal', 'Water Use Intensity', 'gal/ft²'),
+    ('totalLocationBasedGHGEmissions', 'Total GHG Emissions', 'Metric Tons CO2e'),
+    ('totalLocationBasedGHGEmissionsIntensity', 'Total GHG Emissions Intensity', 'kgCO2e/ft²')
+]
+
+# Create the PM-Metrics header for the annual metrics
+# The monthly metrics send the same header for the year ending months, so those calls are only made once per report
+ANNUAL_METRICS_HEADER = ', '.join(name for name, _, _ in ANNUAL_METRICS)
+
+# Set the metrics that are scores (shown as whole numbers without units)
+SCORE_METRICS = ['score', 'waterScore']
+
+
+# Create a record of the annual metrics for each year ending, keyed by ESPM metric name
+# The values of each metric are parsed once into a float array (NaN where ESPM did not calculate the metric),
+# with the year endings in ascending order. The values as ESPM returned them are kept for the report tables
+class AnnualMetrics:
+
+    def __init__(self, year_endings, values, units, texts):
+        self.year_endings = pd.DatetimeIndex(year_endings)
+        self.values = values
+        self.units = units
+        self.texts = texts
+
+    @classmethod
+    def from_metrics(cls, year_endings, metric_lists):
+        # Create the record from the parsed Metric lists of each year ending's /property/{id}/metrics response
+        # The metrics are matched by name, so the order ESPM returns them in does not matter
+        metric_dicts = [{metric.name : metric for metric in metrics} for metrics in metric_lists]
+
+        values = {}
+        units = {}
+        texts = {}
+        for name, _, default_units in ANNUAL_METRICS:
+            year_metrics = [metric_dict.get(name) for metric_dict in metric_dicts]
+            texts[name] = np.array([metric.value if metric is not None else None for metric in year_metrics], dtype = object)
+            values[name] = np.array([float(text) if text is not None else np.nan for text in texts[name]], dtype = np.float64)
+            # Use the units of the first year ESPM returns them for, as ESPM does not return units for metrics without data
+            units[name] = next((metric.uom for metric in year_metrics if metric is not None and metric.uom), default_units)
+
+        # Sort the year endings in ascending order
+        order = np.argsort(np.asarray(year_endings, dtype = 'datetime64[ns]'), kind = 'stable')
+        return cls(np.asarray(year_endings, dtype = 'datetime64[ns]')[order],
+                   {name : metric_values[order] for name, metric_values in values.items()},
+                   units,
+                   {name : metric_texts[order] for name, metric_texts in texts.items()})
+
+    def __len__(self):
+        return len(self.year_endings)
+
+    def __getitem__(self, name):
+        # Return the values of the metric for each year ending
+        return self.values[name]
+
+    def label(self, name):
+        # Return the label of the metric with its units (i.e. Water Use Intensity gal/ft²)
+        metric_label = next(label for metric_name, label, _ in ANNUAL_METRICS if metric_name == name)
+        return f'{metric_label} {self.units[name]}' if self.units[name] else metric_label
+
+    def format(self, name, index):
+        # Return a metric value for the report - scores as whole numbers and N/A if the metric was not calculated
+        value = self.values[name][index]
+        if np.isnan(value):
+            return 'N/A'
+        elif name in SCORE_METRICS:
+            return str(int(value))
+        else:
+            return self.texts[name][index]
+
+    def drop_empty_years(self):
+        # Drop the years that there is no data for - the year ending and the ENERGY STAR Score are always counted
+        # Use a lower threshold when no year has water data to account for the AB802 properties without water
+        counts = 2 + sum(~np.isnan(self.values[name]) for name, _, _ in ANNUAL_METRICS if name != 'score')
+        threshold = 6 if (counts >= 7).any() else 5
+        keep = counts >= threshold
+        return AnnualMetrics(self.year_endings[keep],
+                             {name : metric_values[keep] for name, metric_values in self.values.items()},
+                             self.units,
+                             {name : metric_texts[keep] for name, metric_texts in self.texts.items()})
@@ -0,0 +1,86 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+
+
+# Create a function to split each bill across the calendar months it covers, weighted by the days in each month
+# Bills include both their start and end dates. The result has a row for every month from the first to the last month
+# billed (months without a bill are 0), with the End Date set to the end of the month
+def calendarize(start_dates, end_dates, amounts, name):
+    starts = np.asarray(start_dates, dtype = 'datetime64[D]')
+    ends = np.asarray(end_dates, dtype = 'datetime64[D]')
+    amounts = np.asarray(amounts, dtype = np.float64)
+
+    # Return an empty dataframe if there are no bills
+    if len(amounts) == 0:
+        return pd.DataFrame({'End Date' : pd.Series(dtype = 'datetime64[ns]'),
+                             name : pd.Series(dtype = np.float64)})
+
+    # If a bill's start date is after its end date, treat it as a single day bill on the end date
+    starts = np.minimum(starts, ends)
+
+    # Get the number of days each bill covers and the number of calendar months it touches
+    bill_days = (ends - starts).astype(np.int64) + 1
+    start_months = starts.astype('datetime64[M]')
+    month_counts = (ends.astype('datetime64[M]') - start_months).astype(np.int64) + 1
+
+    # Create a row for each bill and month it touches
+    bill_index = np.repeat(np.arange(len(amounts)), month_counts)
+    month_offsets = np.arange(month_counts.sum()) - np.repeat(np.cumsum(month_counts) - month_counts, month_counts)
+    months = start_months[bill_index] + month_offsets
+
+    # Get the days of the bill that fall within each month, and split the bill's amount by those days
+    month_starts = months.astype('datetime64[D]')
+    month_ends = (months + 1).astype('datetime64[D]') - 1
+    overlap_days = (np.minimum(ends[bill_index], month_ends) - np.maximum(starts[bill_index], month_starts)).astype(np.int64) + 1
+    month_amounts = amounts[bill_index] * overlap_days / bill_days[bill_index]
+
+    # Sum the split amounts for each month from the first to the last month billed
+    first_month = months.min()
+    month_codes = (months - first_month).astype(np.int64)
+    totals = np.bincount(month_codes, weights = month_amounts, minlength = month_codes.max() + 1)
+    month_end_dates = (first_month + np.arange(len(totals)) + 1).astype('datetime64[D]') - 1
+
+    return pd.DataFrame({'End Date' : month_end_dates.astype('datetime64[ns]'),
+                         name : totals})
+
+
+# Create a function to calendarize delivered fuels (i.e. propane), which only have a delivery date and quantity
+# Each delivery is assumed to be used from its delivery date until the day before the next delivery,
+# and the most recent delivery is assigned to its delivery date
+def calendarize_deliveries(delivery_dates, quantities, name):
+    dates = np.asarray(delivery_dates, dtype = 'datetime64[D]')
+    quantities = np.asarray(quantities, dtype = np.float64)
+
+    # Sort the deliveries by date
+    order = np.argsort(dates, kind = 'stable')
+    dates = dates[order]
+    quantities = quantities[order]
+
+    # End each delivery the day before the next delivery (or on its own date for the most recent delivery)
+    ends = dates.copy()
+    ends[:-1] = np.maximum(dates[1:] - 1, dates[:-1])
+
+    return calendarize(dates, ends, quantities, name)
+
+
+# Create a function to calendarize a stream of consumption entries (or deliveries) from sync_consumption
+# The entries are read in one pass, so a meter's history is never held as a list of entries
+def calendarize_entries(entries, name):
+    start_dates, end_dates, amounts = [], [], []
+    deliveries = False
+    for entry in entries:
+        if 'deliveryDate' in entry:
+            deliveries = True
+            end_dates.append(entry['deliveryDate'])
+            amounts.append(entry['quantity'])
+        else:
+            start_dates.append(entry['startDate'])
+            end_dates.append(entry['endDate'])
+            amounts.append(entry['usage'])
+
+    # Delivery meters are spread from each delivery until the next delivery
+    if deliveries:
+        return calendarize_deliveries(end_dates, amounts, name)
+    return calendarize(start_dates, end_dates, amounts, name)
+
@@ -0,0 +1,128 @@
+# Import dependencies
+from collections import namedtuple, OrderedDict
+from concurrent.futures import Future
+import hashlib
+import threading
+import pandas as pd
+import plotly.io as pio
+from Utilities.meter_store import MeterStore
+from Utilities.chart_render import get_render_service
+
+# Create a named tuple to hold a chart's cache key and its figure (None if the plot function had nothing to plot)
+CachedChart = namedtuple('CachedChart', ['key', 'figure'])
+
+
+# Create a function to hash a plot function's name and inputs into a cache key
+# Dataframes are hashed by their values, index, columns and dtypes, meter stores by their rows and meter descriptions,
+# and any other inputs (i.e. the property name) by their repr
+def chart_key(name, *args):
+    digest = hashlib.sha256(name.encode())
+    for arg in args:
+        frames = [arg.data, arg.meters] if isinstance(arg, MeterStore) else [arg] if isinstance(arg, pd.DataFrame) else None
+        if frames is None:
+            digest.update(repr(arg).encode())
+            continue
+        for frame in frames:
+            digest.update(repr(list(frame.columns)).encode())
+            digest.update(repr(list(frame.dtypes.astype(str))).encode())
+            digest.update(pd.util.hash_pandas_object(frame, index = True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+# Create a class to hold an image render that saves the image to the cache once it finishes
+class CachingRender:
+
+    def __init__(self, cache, key, image_format, job):
+        self.cache = cache
+        self.key = key
+        self.image_format = image_format
+        self.job = job
+
+    def result(self):
+        image = self.job.result()
+        self.cache.set_image(self.key, self.image_format, image)
+        return image
+
+
+# Create an in-memory chart cache shared by the Streamlit display and the PDF, keyed by a hash of the plot inputs
+# Each entry holds the figure JSON and the images rendered from it (i.e. PNG bytes)
+# The least recently used entries are evicted once the entries take up more than max_bytes
+class ChartCache:
+
+    def __init__(self, max_bytes = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def chart(self, plot_function, *args):
+        # Return the cached chart for the plot function and inputs, building and caching the figure if it is not cached
+        key = chart_key(plot_function.__name__, *args)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if entry is not None:
+            return CachedChart(key, pio.from_json(entry['figure']) if entry['figure'] is not None else None)
+
+        figure = plot_function(*args)
+        with self.lock:
+            self.misses += 1
+            if key not in self.entries:
+                self.entries[key] = {'figure' : figure.to_json() if figure is not None else None, 'images' : {}}
+                self.size += self._entry_size(self.entries[key])
+                self._evict()
+        return CachedChart(key, figure)
+
+    def get_image(self, key, image_format):
+        # Return the cached image of a chart (None if it has not been rendered in the format)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or image_format not in entry['images']:
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry['images'][image_format]
+
+    def set_image(self, key, image_format, image):
+        # Save a chart's rendered image (if the chart has not been evicted)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and image_format not in entry['images']:
+                entry['images'][image_format] = image
+                self.size += len(image)
+                self._evict()
+
+    def submit_images(self, charts, image_format = 'png', render_service = None):
+        # Start rendering the images of the charts that are not cached in the format
+        # Returns an object with a result() method returning the image bytes for each chart (None where a chart has no figure),
+        # in the same order as the charts
+        render_service = render_service or get_render_service()
+        images = []
+        for chart in charts:
+            if chart.figure is None:
+                images.append(None)
+                continue
+            image = self.get_image(chart.key, image_format)
+            if image is not None:
+                cached = Future()
+                cached.set_result(image)
+                images.append(cached)
+            else:
+                with self.lock:
+                    self.misses += 1
+                job = render_service.submit_figures([chart.figure], image_format)[0]
+                images.append(CachingRender(self, chart.key, image_format, job))
+        return images
+
+    def _entry_size(self, entry):
+        return len(entry['figure'] or '') + sum(len(image) for image in entry['images'].values())
+
+    def _evict(self):
+        # Remove the least recently used entries until the cache fits in max_bytes (keeping at least the newest entry)
+        while self.size > self.max_bytes and len(self.entries) > 1:
+            _, entry = self.entries.popitem(last = False)
+            self.size -= self._entry_size(entry)
@@ -0,0 +1,192 @@
+# Import dependencies
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+import plotly.graph_objects as go
+import plotly.io as pio
+
+# Set how many worker processes rasterize the charts at the same time
+# kaleido 0.2 runs one Chromium process per Python process and renders one figure at a time on it,
+# so the charts are rasterized in parallel by giving each worker process its own kaleido (one worker per CPU, up to 3)
+RENDER_WORKERS = min(3, os.cpu_count() or 1)
+
+# Set how often the render service checks that its workers can still render, and how long a check may take
+HEALTH_CHECK_SECONDS = 60
+HEALTH_CHECK_TIMEOUT = 30
+
+# Hold the render service once it is started so every report shares the warm workers
+_service = None
+_service_lock = threading.Lock()
+
+
+# Create a function to start kaleido in a worker process by rendering a blank figure
+# Used as the worker initializer so Chromium's start up is paid when the worker starts rather than by the first chart
+def warm_kaleido():
+    pio.to_image(go.Figure(), format = 'png', width = 10, height = 10)
+
+
+# Create a function to rasterize a figure (as plotly JSON) in a worker process
+# Returns the time the worker started the render (to measure how long the figure waited in the queue) and the image bytes
+def render_figure_json(fig_json, image_format = 'png'):
+    started = time.time()
+    return started, pio.to_image(pio.from_json(fig_json), format = image_format)
+
+
+# Create a function to stop a worker pool, killing its worker processes (i.e. a hung kaleido) and reaping them
+# The pool's queued renders are cancelled, and the reports waiting on them resubmit them to the new pool
+def stop_pool(executor):
+    processes = list((executor._processes or {}).values())
+    executor.shutdown(wait = False, cancel_futures = True)
+    for process in processes:
+        process.terminate()
+    for process in processes:
+        process.join(5)
+        if process.is_alive():
+            process.kill()
+            process.join()
+
+
+# Create a class to hold a figure's render in the service's worker pool
+# If the pool breaks (i.e. a worker crashed) or is replaced before the render finishes, the figure is resubmitted once
+class RenderJob:
+
+    def __init__(self, service, fig_json, image_format):
+        self.service = service
+        self.fig_json = fig_json
+        self.image_format = image_format
+        self.queue_wait = None
+        self._submit()
+
+    def _submit(self):
+        self.submitted = time.time()
+        self.executor, self.future = self.service.submit(render_figure_json, self.fig_json, self.image_format)
+
+    def result(self):
+        # Return the image bytes, waiting for the render to finish
+        try:
+            started, image = self.future.result()
+        except (BrokenProcessPool, CancelledError):
+            # A cancelled render was queued on a pool the health check or another report restarted
+            self.service.restart(self.executor)
+            self._submit()
+            started, image = self.future.result()
+
+        if self.queue_wait is None:
+            self.queue_wait = max(0.0, started - self.submitted)
+            self.service.record_wait(started, self.queue_wait)
+        return image
+
+
+# Create a long running chart render service with a pool of warm kaleido worker processes
+# A background thread renders a blank figure every HEALTH_CHECK_SECONDS and restarts the pool if it fails or times out
+class RenderService:
+
+    def __init__(self, max_workers = RENDER_WORKERS, health_check_seconds = HEALTH_CHECK_SECONDS):
+        self.max_workers = max_workers
+        self.health_check_seconds = health_check_seconds
+        self.lock = threading.Lock()
+        self.executor = None
+        self.restarts = 0
+        # Hold the (render start time, queue wait) of the most recent renders
+        self.waits = deque(maxlen = 1000)
+        self.stopped = threading.Event()
+
+    def start(self):
+        # Start the worker pool and warm every worker's kaleido, then start the health checks
+        with self.lock:
+            if self.executor is None:
+                self.executor = self._start_pool()
+        threading.Thread(target = self._monitor, daemon = True).start()
+        return self
+
+    def _start_pool(self):
+        # The workers are spawned rather than forked, as the app process has running threads (i.e. Streamlit's)
+        executor = ProcessPoolExecutor(max_workers = self.max_workers,
+                                       mp_context = multiprocessing.get_context('spawn'),
+                                       initializer = warm_kaleido)
+        # Submit a task for each worker so they all start (and warm kaleido) now instead of on the first report
+        for _ in range(self.max_workers):
+            executor.submit(os.getpid)
+        return executor
+
+    def submit(self, function, *args):
+        # Submit a task to the current pool, restarting the pool if it is broken
+        # Returns the pool the task was submitted to and its future
+        with self.lock:
+            executor = self.executor
+        try:
+            return executor, executor.submit(function, *args)
+        except (BrokenProcessPool, RuntimeError):
+            # The pool broke, or was shut down by a restart after it was read
+            executor = self.restart(executor)
+            return executor, executor.submit(function, *args)
+
+    def restart(self, broken_executor):
+        # Replace the pool if it is still the broken one (another job or the health check may have replaced it already)
+        with self.lock:
+            executor = self.executor
+            if executor is not broken_executor:
+                return executor
+            executor = self.executor = self._start_pool()
+            self.restarts += 1
+        # Stop the broken pool outside the lock, so other reports can submit to the new pool meanwhile
+        stop_pool(broken_executor)
+        return executor
+
+    def health_check(self, timeout = HEALTH_CHECK_TIMEOUT):
+        # Render a blank figure on the pool, restarting the pool if it cannot
+        # Returns True if the pool was healthy
+        executor, future = self.submit(warm_kaleido)
+        try:
+            future.result(timeout = timeout)
+            return True
+        except Exception:
+            self.restart(executor)
+            return False
+
+    def _monitor(self):
+        while not self.stopped.wait(self.health_check_seconds):
+            self.health_check()
+
+    def submit_figures(self, figures, image_format = 'png'):
+        # Start rasterizing a list of figures concurrently
+        # Returns a RenderJob for each figure in the same order as the figures (None where a figure is None),
+        # so the images can be placed in page order while the later figures are still rendering
+        return [RenderJob(self, fig.to_json(), image_format) if fig is not None else None
+                for fig in figures]
+
+    def record_wait(self, started, queue_wait):
+        with self.lock:
+            self.waits.append((started, queue_wait))
+
+    def waits_since(self, since):
+        # Return the queue waits (in seconds) of the renders that started after since (a time.time() timestamp)
+        with self.lock:
+            return [queue_wait for started, queue_wait in self.waits if started >= since]
+
+    def stop(self):
+        self.stopped.set()
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            stop_pool(executor)
+
+
+# Create a function to get the render service, starting it on the first call
+def get_render_service():
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = RenderService().start()
+            atexit.register(_service.stop)
+        return _service
+
+
+# Create a function to start rasterizing a list of figures on the render service
+def submit_figures(figures, image_format = 'png'):
+    return get_render_service().submit_figures(figures, image_format)
@@ -0,0 +1,147 @@
+# Import dependencies
+import sqlite3
+import threading
+from datetime import date, timedelta
+from Utilities.espm_xml import parse_consumption_page
+
+# Set how many days before the last synced end date to pull again, to pick up edits to the most recent bills
+RESYNC_OVERLAP_DAYS = 62
+
+
+# Create a SQLite backed store of each meter's consumption entries and the last end date that was synced
+# The entries are keyed by their ESPM entry id, so re-dated entries replace their old row and same day deliveries are kept apart
+class ConsumptionStore:
+
+    def __init__(self, path = '.espm_consumption.sqlite'):
+        # Open the database so it can be shared by the client's threads, using a lock to make one query at a time
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread = False)
+        with self.lock, self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS entries ('
+                                    'meter_id TEXT, '
+                                    'entry_id TEXT, '
+                                    'kind TEXT, '
+                                    'start_date TEXT, '
+                                    'end_date TEXT, '
+                                    'amount TEXT, '
+                                    'PRIMARY KEY (meter_id, entry_id))')
+            self.connection.execute('CREATE TABLE IF NOT EXISTS synced ('
+                                    'meter_id TEXT PRIMARY KEY, '
+                                    'last_end_date TEXT)')
+
+    def last_end_date(self, meter_id):
+        # Return the last end date synced for the meter (or None if it has never been synced)
+        with self.lock:
+            row = self.connection.execute('SELECT last_end_date FROM synced WHERE meter_id = ?',
+                                          (str(meter_id),)).fetchone()
+        return row[0] if row else None
+
+    def clear(self, meter_id):
+        # Remove the meter's entries and sync date before pulling its entire history again
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM entries WHERE meter_id = ?', (str(meter_id),))
+            self.connection.execute('DELETE FROM synced WHERE meter_id = ?', (str(meter_id),))
+
+    def merge(self, meter_id, rows):
+        # Insert or update the meter's (entry_id, kind, start_date, end_date, amount) rows
+        with self.lock, self.connection:
+            self.connection.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                        [(str(meter_id),) + tuple(row) for row in rows])
+
+    def replace_since(self, meter_id, start_date, rows):
+        # Replace the meter's rows ending on or after start_date with the resynced rows in one transaction,
+        # so entries that were re-dated or deleted in ESPM since the last sync do not stay behind
+        with self.lock, self.connection:
+            self.connection.execute('DELETE FROM entries WHERE meter_id = ? AND end_date >= ?', (str(meter_id), start_date))
+            self.connection.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)',
+                                        [(str(meter_id),) + tuple(row) for row in rows])
+
+    def mark_synced(self, meter_id):
+        # Record the last end date stored for the meter once every page of a sync has been merged
+        with self.lock, self.connection:
+            last_end_date = self.connection.execute('SELECT MAX(end_date) FROM entries WHERE meter_id = ?',
+                                                    (str(meter_id),)).fetchone()[0]
+            self.connection.execute('INSERT OR REPLACE INTO synced VALUES (?, ?)',
+                                    (str(meter_id), last_end_date))
+
+    def rows(self, meter_id, chunk_size = 1000):
+        # Yield the meter's (entry_id, kind, start_date, end_date, amount) rows with the most recent entry first,
+        # reading chunk_size rows at a time so the meter's history is not loaded at once
+        with self.lock:
+            cursor = self.connection.execute('SELECT entry_id, kind, start_date, end_date, amount FROM entries '
+                                             'WHERE meter_id = ? ORDER BY end_date DESC',
+                                             (str(meter_id),))
+        while True:
+            with self.lock:
+                rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+# Create a generator that pulls a meter's consumptionData one page at a time, following the next page links
+# Each page's rows are yielded before the next page is requested so only one page is held in memory
+def iter_consumption_pages(client, meter_id, start_date = None):
+    path = f'/meter/{meter_id}/consumptionData'
+    if start_date is not None:
+        path += f'?startDate={start_date}'
+
+    while path is not None:
+        rows, next_link = parse_consumption_page(client.get(path).content)
+        yield rows
+
+        # The next page link may be a full url or a path relative to the API domain
+        if next_link is not None and next_link.startswith('http'):
+            next_link = next_link.split('/ws', 1)[-1]
+        path = next_link
+
+
+# Create a generator that yields every consumption row for a meter across all of its pages
+def iter_consumption_rows(client, meter_id, start_date = None):
+    for rows in iter_consumption_pages(client, meter_id, start_date):
+        yield from rows
+
+
+# Create a generator to convert (entry_id, kind, start_date, end_date, amount) rows into the entry dictionaries used by the pullers
+def rows_to_entries(rows):
+    for _, kind, start_date, end_date, amount in rows:
+        if kind == 'delivery':
+            yield {'deliveryDate' : end_date, 'quantity' : amount}
+        else:
+            yield {'startDate' : start_date, 'endDate' : end_date, 'usage' : amount}
+
+
+# Create a generator to bring a meter's stored consumption up to date and yield all of its entries (most recent first)
+# Only the entries after the last synced end date (less an overlap) are requested from ESPM
+# The sync starts when the first entry is requested
+def sync_consumption(client, store, meter_id, full_sync = False):
+    # If there is no store, stream the entire history straight from ESPM
+    if store is None:
+        yield from rows_to_entries(iter_consumption_rows(client, meter_id))
+        return
+
+    # Request the entries starting shortly before the last synced end date, or the entire history for a new meter
+    last_end_date = None if full_sync else store.last_end_date(meter_id)
+    if last_end_date is None:
+        store.clear(meter_id)
+        start_date = None
+    else:
+        start_date = (date.fromisoformat(last_end_date) - timedelta(days = RESYNC_OVERLAP_DAYS)).isoformat()
+
+    # For the entire history, merge each page into the store as it arrives
+    # For an incremental sync, collect the resynced pages (the overlap and the new entries) and replace the stored rows
+    # from the start date with them in one transaction
+    if start_date is None:
+        for rows in iter_consumption_pages(client, meter_id):
+            store.merge(meter_id, rows)
+    else:
+        store.replace_since(meter_id, start_date,
+                            [row for rows in iter_consumption_pages(client, meter_id, start_date) for row in rows])
+    # Record the sync once every page has been merged
+    store.mark_synced(meter_id)
+
+    yield from rows_to_entries(store.rows(meter_id))
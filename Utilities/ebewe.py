@@ -0,0 +1,93 @@
+# Import dependencies
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Create a dictionary to hold the last year of the compliance period and their corresponding last digit of the LADBS Building ID
+COMPLIANCE_YEARS = {'0' : 2025,
+                    '1' : 2025,
+                    '2' : 2026,
+                    '3' : 2026,
+                    '4' : 2027,
+                    '5' : 2027,
+                    '6' : 2028,
+                    '7' : 2028,
+                    '8' : 2024,
+                    '9' : 2024}
+
+# If the reissued dates are being used, the ids ending in 0, 1, 2, 3 have a 2022 compliance year
+REISSUED_COMPLIANCE_YEARS = {'0' : 2022,
+                             '1' : 2022,
+                             '2' : 2022,
+                             '3' : 2022,
+                             '4' : 2022,
+                             '5' : 2022,
+                             '6' : 2023,
+                             '7' : 2023,
+                             '8' : 2024,
+                             '9' : 2024}
+
+# Set how many years before each recent month are compared to it when looking for the best shift
+COMPARATIVE_YEARS = 4
+
+# Create a named tuple to hold a shift and the months it is from and to
+Shift = namedtuple('Shift', ['shift', 'from_year', 'from_month', 'to_year', 'to_month'])
+
+
+# Create a function to check if the year ending is the last year of the building's EBEWE compliance period
+# The last digit of the LADBS Building ID sets the compliance period ('None' if the building does not have an id)
+def is_compliance_year(la_id, year_ending, reissued_check = False):
+    if la_id == 'None':
+        return False
+    comp_periods = REISSUED_COMPLIANCE_YEARS if reissued_check else COMPLIANCE_YEARS
+    return comp_periods[la_id[-1]] == int(year_ending)
+
+
+# Create a function to get the first and last month ends that are compared to the comparative period
+# i.e. the last month of the comparative period and the next 11 months
+# If the reissued dates are being used, the months are shifted back for the reissued due date
+def comparative_window(year_ending, reissued_check = False, reissued_date = None):
+    if reissued_check and reissued_date == 'September 7, 2023':
+        return pd.Timestamp(f'10-31-{year_ending}'), pd.Timestamp(f'8-31-{year_ending + 1}')
+    elif reissued_check and reissued_date == 'October 7, 2023':
+        return pd.Timestamp(f'11-30-{year_ending}'), pd.Timestamp(f'9-30-{year_ending + 1}')
+    # If the reissued dates are not used, the comparative period remains the same
+    else:
+        return pd.Timestamp(f'12-31-{year_ending}'), pd.Timestamp(f'11-30-{year_ending + 1}')
+
+
+# Create a function to find the best (lowest) shift of a monthly metric from the same month in one of the previous years
+# Each month from start to end is compared to the same month in each of the previous COMPARATIVE_YEARS years, all at once,
+# by keying every month by its (year, month) as year * 12 + month
+# Returns a Shift (as a fraction) or None if no month in the window has a shift
+def best_shift(monthly_df, column, start, end, years_back = COMPARATIVE_YEARS):
+    if monthly_df is None:
+        return None
+
+    end_dates = pd.DatetimeIndex(monthly_df['End Date'])
+    values = monthly_df[column].to_numpy(dtype = np.float64)
+    keys = end_dates.year.to_numpy() * 12 + end_dates.month.to_numpy()
+
+    # Index each month's value by its (year, month) key - a month with more than one row has no single value to compare to
+    unique_keys = pd.Series(values, index = keys)
+    unique_keys = unique_keys[~unique_keys.index.duplicated(keep = False)]
+
+    # Get the recent months within the window and the keys of the same month in each of the previous years
+    recent = np.flatnonzero((end_dates >= start) & (end_dates <= end))
+    comparative_keys = keys[recent, np.newaxis] - 12 * np.arange(1, years_back + 1)
+
+    # Look up the comparative values (NaN where there is no value for the month) and calculate every shift
+    positions = unique_keys.index.get_indexer(comparative_keys.ravel()).reshape(comparative_keys.shape)
+    comparative_values = np.append(unique_keys.to_numpy(), np.nan)[positions]
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        shifts = (values[recent, np.newaxis] - comparative_values) / comparative_values
+
+    # Return the lowest shift (the first one found if there is a tie)
+    if np.isnan(shifts).all():
+        return None
+    best_row, best_year = np.unravel_index(np.nanargmin(shifts), shifts.shape)
+    best_key = comparative_keys[best_row, best_year]
+    recent_key = keys[recent[best_row]]
+    return Shift(shifts[best_row, best_year].item(),
+                 int((best_key - 1) // 12), int((best_key - 1) % 12 + 1),
+                 int((recent_key - 1) // 12), int((recent_key - 1) % 12 + 1))
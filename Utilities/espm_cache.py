@@ -0,0 +1,101 @@
+# Import dependencies
+import re
+import sqlite3
+import threading
+import time
+from datetime import date
+
+# Set the lengths of time (seconds) that cached responses are considered fresh
+ONE_HOUR = 60 * 60
+ONE_DAY = 24 * ONE_HOUR
+THIRTY_DAYS = 30 * ONE_DAY
+
+
+# Create a function to choose how long a response for an ESPM path stays fresh
+def cache_ttl(path, today = None):
+    today = today or date.today()
+
+    # Meter information rarely changes
+    if re.fullmatch(r'/meter/\d+', path):
+        return THIRTY_DAYS
+
+    # Metrics for a month that closed more than three months ago almost never change, recent months can still get new bills
+    metrics_month = re.search(r'/metrics\?year=(\d+)&month=(\d+)', path)
+    if metrics_month:
+        months_ago = (today.year - int(metrics_month.group(1))) * 12 + today.month - int(metrics_month.group(2))
+        return THIRTY_DAYS if months_ago > 3 else ONE_HOUR
+
+    # Monthly metrics are requested for a whole calendar year, only years before last year are closed
+    monthly_metrics_year = re.search(r'/metrics/monthly\?year=(\d+)', path)
+    if monthly_metrics_year:
+        return THIRTY_DAYS if int(monthly_metrics_year.group(1)) < today.year - 1 else ONE_HOUR
+
+    # Everything else (property information, identifiers, meter associations and consumption) is refreshed daily
+    return ONE_DAY
+
+
+# Create a SQLite backed cache to store ESPM responses on disk between reports
+class ESPMResponseCache:
+
+    def __init__(self, path = '.espm_cache.sqlite', max_bytes = 200 * 1024 * 1024):
+        # Store the most bytes of responses to keep before evicting the least recently used responses
+        self.max_bytes = max_bytes
+
+        # Open the database so it can be shared by the client's threads, using a lock to make one query at a time
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread = False)
+        with self.lock, self.connection:
+            self.connection.execute('CREATE TABLE IF NOT EXISTS responses ('
+                                    'key TEXT PRIMARY KEY, '
+                                    'content BLOB, '
+                                    'etag TEXT, '
+                                    'last_modified TEXT, '
+                                    'expires_at REAL, '
+                                    'last_used REAL, '
+                                    'size INTEGER)')
+
+    def get(self, key):
+        # Return the cached entry for the key as a dictionary (or None if it is not cached) and mark it as recently used
+        with self.lock, self.connection:
+            row = self.connection.execute('SELECT content, etag, last_modified, expires_at FROM responses WHERE key = ?',
+                                          (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute('UPDATE responses SET last_used = ? WHERE key = ?',
+                                    (time.time(), key))
+
+        return {'content' : row[0],
+                'etag' : row[1],
+                'last_modified' : row[2],
+                'expires_at' : row[3]}
+
+    def set(self, key, content, ttl, etag = None, last_modified = None):
+        # Store the response content with its validators, then evict the oldest responses if the cache is too large
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                    (key, content, etag, last_modified, now + ttl, now, len(content)))
+            self._evict()
+
+    def refresh(self, key, ttl):
+        # Extend the freshness of a response that ESPM confirmed has not changed
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute('UPDATE responses SET expires_at = ?, last_used = ? WHERE key = ?',
+                                    (now + ttl, now, key))
+
+    def _evict(self):
+        # Delete the least recently used responses until the cache is within max_bytes
+        total_size = self.connection.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        for key, size in self.connection.execute('SELECT key, size FROM responses ORDER BY last_used').fetchall():
+            self.connection.execute('DELETE FROM responses WHERE key = ?', (key,))
+            total_size -= size
+            if total_size <= self.max_bytes:
+                break
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,231 @@
+# Import dependencies
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, Future, FIRST_COMPLETED, wait
+import threading
+import time
+from Utilities.espm_cache import cache_ttl
+
+
+# Create a token bucket to limit the rate of calls made to ESPM across every thread
+class TokenBucket:
+
+    def __init__(self, rate, capacity = None):
+        # Store the rate that tokens refill (per second) and the most tokens that can be held for a burst
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.last_refill = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        # Wait until a token is available, then take it
+        while True:
+            with self.lock:
+                # Refill the tokens for the time that has passed since the last refill
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+                self.last_refill = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                # Calculate how long until the next token is available
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+# Create a client that holds one pooled, authenticated session for all of the ESPM API calls within a report
+class ESPMClient:
+
+    def __init__(self, auth, domain = 'https://portfoliomanager.energystar.gov/ws',
+                 pool_size = 10, timeout = 60, rate_limit = 10, 
+                 max_retries = 4, backoff_factor = 0.5, memoize = True, 
+                 cache = None, bypass_cache = False):
+        # Store the domain for the API calls, the pool size and the default timeout (seconds) for each call
+        self.domain = domain
+        self.pool_size = pool_size
+        self.timeout = timeout
+
+        # Create the session and set the credentials used for every call
+        self.session = requests.Session()
+        self.session.auth = auth
+
+        # Mount an adapter that keeps up to pool_size connections alive so calls reuse the TLS connection
+        adapter = HTTPAdapter(pool_connections = 1,
+                              pool_maxsize = pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Create a token bucket to limit the calls per second (no limit if rate_limit is None)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+
+        # Store the number of retries and the backoff for throttled (429) and server error (5xx) responses
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+
+        # Create a memo to serve identical calls (same path and PM-Metrics header) once per client
+        # Count the calls made over the network and the calls served from the memo
+        self.memoize = memoize
+        self.memo = {}
+        self.memo_lock = threading.Lock()
+        self.calls_made = 0
+        self.calls_saved = 0
+
+        # Store the on-disk response cache (an ESPMResponseCache or None)
+        # If bypass_cache is set, cached responses are not read but fresh responses are still stored
+        self.cache = cache
+        self.bypass_cache = bypass_cache
+        self.cache_hits = 0
+
+        # Create a thread pool the size of the connection pool, shared by every concurrent call made through the client
+        self.executor = ThreadPoolExecutor(max_workers = pool_size)
+
+    def get(self, path, headers = None, timeout = None):
+        # If memoizing is turned off, make the call directly
+        # Paged consumption data is only read once per meter as it is streamed, so it is not kept in the memo
+        if not self.memoize or '/consumptionData' in path:
+            return self._fetch_cached(path, headers, timeout)
+
+        # Key the memo on the path and the PM-Metrics header
+        key = (path, self._metrics_key(headers))
+
+        # Check if the call has already been made (or is being made by another thread)
+        with self.memo_lock:
+            memo_entry = self.memo.get(key)
+            if memo_entry is None:
+                memo_entry = Future()
+                self.memo[key] = memo_entry
+                first_call = True
+            else:
+                self.calls_saved += 1
+                first_call = False
+
+        # If this is the first time the call is made, make it and share the response through the memo
+        if first_call:
+            try:
+                response = self._fetch_cached(path, headers, timeout)
+            except Exception as error:
+                # Remove the failed call from the memo so it can be made again, and pass the error to any waiting threads
+                with self.memo_lock:
+                    del self.memo[key]
+                memo_entry.set_exception(error)
+                raise
+            # Only keep successful responses in the memo
+            if not response.ok:
+                with self.memo_lock:
+                    del self.memo[key]
+            memo_entry.set_result(response)
+
+        return memo_entry.result()
+
+    def _metrics_key(self, headers):
+        # Return the PM-Metrics header with the whitespace between metrics removed (None if there is no header)
+        metrics = (headers or {}).get('PM-Metrics')
+        if metrics is not None:
+            metrics = ','.join(metric.strip() for metric in metrics.split(','))
+        return metrics
+
+    def _fetch_cached(self, path, headers = None, timeout = None):
+        # If there is no cache, make the call directly
+        if self.cache is None:
+            return self._fetch(path, headers, timeout)
+
+        # Key the cache on the account, the full url and the PM-Metrics header
+        key = f"{self.session.auth[0]}|{self.domain + path}|{self._metrics_key(headers)}"
+        ttl = cache_ttl(path)
+        entry = self.cache.get(key)
+
+        # Return the cached response if it is still fresh (unless the cache is being bypassed)
+        if entry is not None and not self.bypass_cache:
+            if entry['expires_at'] > time.time():
+                with self.memo_lock:
+                    self.cache_hits += 1
+                return self._cached_response(path, entry['content'])
+
+        # If a stale response is cached, ask ESPM to revalidate it with its validators
+        request_headers = dict(headers or {})
+        if entry is not None and not self.bypass_cache:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self._fetch(path, request_headers, timeout)
+
+        # If ESPM reports the response has not changed, extend its freshness and return the cached content
+        if response.status_code == 304 and entry is not None:
+            self.cache.refresh(key, ttl)
+            return self._cached_response(path, entry['content'])
+
+        # Store successful responses in the cache
+        if response.status_code == 200:
+            self.cache.set(key, response.content, ttl,
+                           etag = response.headers.get('ETag'),
+                           last_modified = response.headers.get('Last-Modified'))
+
+        return response
+
+    def _cached_response(self, path, content):
+        # Build a response object from cached content so the pullers can read it like a response from ESPM
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.domain + path
+        response._content = content
+        return response
+
+    def _fetch(self, path, headers = None, timeout = None):
+        for attempt in range(self.max_retries + 1):
+            # Wait for the rate limiter before making each attempt
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+
+            # Make the call with the session, using the default timeout if one was not given
+            with self.memo_lock:
+                self.calls_made += 1
+            response = self.session.get(self.domain + path,
+                                        headers = headers,
+                                        timeout = timeout if timeout is not None else self.timeout)
+
+            # Return the response unless it was throttled or a server error that can be retried
+            if not (response.status_code == 429 or response.status_code >= 500) or attempt == self.max_retries:
+                return response
+
+            # Wait before retrying - use the Retry-After header if ESPM sent one, otherwise back off exponentially
+            retry_after = response.headers.get('Retry-After')
+            if retry_after is not None and retry_after.isdigit():
+                time.sleep(int(retry_after))
+            else:
+                time.sleep(self.backoff_factor * (2 ** attempt))
+
+    def get_many(self, calls, max_concurrency = None, timeout = None):
+        # Make a list of (path, headers) calls concurrently and return the responses in the same order as the calls
+        # Limit the number of calls in flight to max_concurrency (defaults to the pool size)
+        limit = max_concurrency or self.pool_size
+        responses = [None] * len(calls)
+        in_flight = {}
+
+        for index, (path, headers) in enumerate(calls):
+            # If the limit is reached, wait for a call to finish before submitting the next one
+            if len(in_flight) >= limit:
+                done, _ = wait(in_flight, return_when = FIRST_COMPLETED)
+                for future in done:
+                    responses[in_flight.pop(future)] = future.result()
+            in_flight[self.executor.submit(self.get, path, headers, timeout)] = index
+
+        # Collect the remaining responses
+        for future, index in in_flight.items():
+            responses[index] = future.result()
+
+        return responses
+
+    def close(self):
+        # Shut down the thread pool, then close the session and release the pooled connections
+        self.executor.shutdown(wait = True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,96 @@
+# Import dependencies
+import io
+import xml.etree.ElementTree as ET
+from collections import namedtuple
+import numpy as np
+
+# Create named tuples to hold the fields pulled from the ESPM responses
+Metric = namedtuple('Metric', ['name', 'uom', 'value'])
+MonthlyMetric = namedtuple('MonthlyMetric', ['name', 'uom', 'years', 'months', 'values'])
+
+
+# Create a helper to strip the namespace from a tag (i.e. {namespace}value -> value)
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+# Create a function to pull each metric's name, units and value from a /property/{id}/metrics response
+# Values are kept as strings, with None for metrics that ESPM did not calculate
+# These responses are small, so they are parsed in one pass rather than incrementally
+def parse_metrics(content):
+    metrics = []
+    for element in ET.fromstring(content):
+        if local_name(element.tag) == 'metric':
+            value = None
+            for child in element:
+                if local_name(child.tag) == 'value':
+                    value = child.text
+            metrics.append(Metric(element.get('name'), element.get('uom'), value))
+    return metrics
+
+
+# Create a function to pull each metric's monthly values from a /property/{id}/metrics/monthly response
+# The years and months are stored in integer arrays and the values in a float array (NaN if not calculated)
+def parse_monthly_metrics(content):
+    metrics = []
+    years, months, values = [], [], []
+    for _, element in ET.iterparse(io.BytesIO(content)):
+        tag = local_name(element.tag)
+        if tag == 'monthlyMetric':
+            years.append(int(element.get('year')))
+            months.append(int(element.get('month')))
+            value = None
+            for child in element:
+                if local_name(child.tag) == 'value':
+                    value = child.text
+            values.append(float(value) if value is not None else np.nan)
+            element.clear()
+        elif tag == 'metric':
+            metrics.append(MonthlyMetric(element.get('name'), element.get('uom'),
+                                         np.array(years, dtype = np.int32),
+                                         np.array(months, dtype = np.int32),
+                                         np.array(values, dtype = np.float64)))
+            years, months, values = [], [], []
+            element.clear()
+    return metrics
+
+
+# Create a function to parse a consumptionData page into (entry_id, kind, start_date, end_date, amount) rows and the next page link
+# The entry_id is ESPM's id for the consumption entry or delivery
+# The entries are read as they are parsed and cleared, so only the rows are kept in memory
+def parse_consumption_page(content):
+    rows = []
+    next_link = None
+    for _, element in ET.iterparse(io.BytesIO(content)):
+        tag = local_name(element.tag)
+        if tag == 'meterConsumption':
+            fields = {local_name(child.tag) : child.text for child in element}
+            rows.append((fields.get('id'), 'consumption', fields['startDate'], fields['endDate'], fields['usage']))
+            element.clear()
+        # Delivery meters (i.e. propane) have a delivery date and quantity instead of a start/end date and usage
+        elif tag == 'meterDelivery':
+            fields = {local_name(child.tag) : child.text for child in element}
+            rows.append((fields.get('id'), 'delivery', fields['deliveryDate'], fields['deliveryDate'], fields['quantity']))
+            element.clear()
+        # Find the link to the next page of entries (None on the last page)
+        elif tag == 'link':
+            if 'next' in element.get('linkDescription', '') or 'next' in element.get('hint', ''):
+                next_link = element.get('link')
+    return rows, next_link
+
+
+# Create a function to pull the meter fields from a /meter/{id} response into a dictionary (i.e. type, name, unitOfMeasure)
+def parse_meter(content):
+    root = ET.fromstring(content)
+    return {local_name(child.tag) : child.text for child in root}
+
+
+# Create a function to pull the energy and water meter ids from a /association/property/{id}/meter response
+# The water meter ids are None if the property does not have a water meter association
+def parse_meter_associations(content):
+    root = ET.fromstring(content)
+    meter_ids = {}
+    for association in root:
+        meter_ids[local_name(association.tag)] = [meter_id.text for meter_id in association.iter()
+                                                  if local_name(meter_id.tag) == 'meterId']
+    return meter_ids.get('energyMeterAssociation', []), meter_ids.get('waterMeterAssociation')
@@ -2,7 +2,6 @@
 from fpdf import FPDF
 from fpdf.fonts import FontFace
 import numpy as np
-import copy
 import io
 from datetime import date
 import math
@@ -11,6 +10,9 @@ import pandas as pd
 from Utilities.plot_metrics import (graph_eu, graph_hcf, graph_es_score, 
                                     graph_seui, graph_e_meters_overlay, 
                                     graph_g_meters_overlay)
+from Utilities.ebewe import is_compliance_year, comparative_window, best_shift
+from Utilities.chart_cache import ChartCache
+from Utilities import pdf_charts
 import streamlit as st
 
 def earliest_full_data(df):
@@ -24,10 +26,23 @@ def earliest_full_data(df):
     else:
         return df['End Date'].min()
 
+# Create a function to write a best shift and the months it is from and to
+def format_shift(shift):
+    # If there are no months to compare, the shift is not available
+    if shift is None:
+        return 'N/A'
+    return (f"From {calendar.month_abbr[shift.from_month]} {shift.from_year} " + 
+            f"to {calendar.month_abbr[shift.to_month]} {shift.to_year}: {round(shift.shift * 100, 2)}% shift")
+
 # Using the fpdf library, generate a progress and goals report for the selected property
 def generate_pdf(about_data, ann_metrics, prop_id, 
                  year_ending, monthly_kbtu, water_df, 
-                 monthly_energy, reissued_check, reissued_date = None):
+                 monthly_energy, energy_meters, water_meters, 
+                 reissued_check, reissued_date = None, chart_cache = None, chart_format = 'png'):
+    # Build the charts through the chart cache shared with the Streamlit display (a new cache if one is not given)
+    # The charts are embedded as PNG images if chart_format is 'png'
+    # If chart_format is 'native', the charts are drawn straight onto the pdf without plotly or kaleido
+    chart_cache = chart_cache if chart_cache is not None else ChartCache()
 
     class PDF(FPDF):
 
@@ -71,6 +86,46 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                                 'Orange, CA 92868']),
                      align = 'C')
 
+    # Build every report chart first in page order - the kbtu, water, source EUI, ENERGY STAR score, electric and gas meter charts
+    # The chart functions return None if there is nothing to plot (i.e. no water meter)
+    full_data_energy = monthly_energy.loc[monthly_energy['End Date'] >= earliest_full_data(monthly_kbtu)]
+    if chart_format == 'native':
+        charts = [pdf_charts.eu_chart(monthly_kbtu, about_data['prop_address']), 
+                  pdf_charts.hcf_chart(water_meters, about_data['prop_address']), 
+                  pdf_charts.seui_chart(full_data_energy), 
+                  pdf_charts.es_score_chart(full_data_energy), 
+                  pdf_charts.e_meters_chart(energy_meters), 
+                  pdf_charts.g_meters_chart(energy_meters)]
+    else:
+        # Start rasterizing the plotly figures concurrently, so the charts render while the first pages are laid out
+        # Charts and images that are already cached for the same inputs are not built or rendered again
+        charts = [chart_cache.chart(graph_eu, monthly_kbtu, about_data['prop_address']), 
+                  chart_cache.chart(graph_hcf, water_meters, about_data['prop_address']), 
+                  chart_cache.chart(graph_seui, full_data_energy), 
+                  chart_cache.chart(graph_es_score, full_data_energy), 
+                  chart_cache.chart(graph_e_meters_overlay, energy_meters), 
+                  chart_cache.chart(graph_g_meters_overlay, energy_meters)]
+        images = chart_cache.submit_images(charts, chart_format)
+
+    # Create a function to place a chart at the current position, taking up half of the page
+    # Returns False if there is no chart to place
+    def place_chart(index):
+        chart_w = pdf.epw
+        chart_h = (pdf.eph / 2) * 0.9
+        if chart_format == 'native':
+            if charts[index] is None:
+                return False
+            pdf_charts.draw_chart(pdf, charts[index], pdf.x, pdf.y, chart_w, chart_h, font_family = 'Roboto')
+            pdf.set_y(pdf.y + chart_h)
+        else:
+            if images[index] is None:
+                return False
+            # Each image is placed in page order once it is ready
+            pdf.image(io.BytesIO(images[index].result()), 
+                      w = chart_w, 
+                      h = chart_h)
+        return True
+
     # Create the pdf object and set the author and title
     # pdf = FPDF()
     pdf = PDF()
@@ -138,7 +193,7 @@ def generate_pdf(about_data, ann_metrics, prop_id,
     # Insert the Energy Star Score for the selected year ending date
     pdf.cell(w = es_score_w,  
              h = es_score_h,  
-             txt = f"**{ann_metrics.loc[0, 'ENERGY STAR Score']}**", 
+             txt = f"**{ann_metrics.format('score', -1)}**", 
              markdown = True,
              border = 0, 
              align = 'C')
@@ -151,7 +206,7 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                    txt = f"**Primary Property Type:** {about_data['prop_function']}\n" + 
                          f"**Gross Floor Area:** {'{:,}'.format(int(about_data['prop_sq_ft']))}\n" + 
                          f'\n' + 
-                         f"**For Year Ending:** {ann_metrics['Year Ending'].dt.date[0]}\n" + 
+                         f"**For Year Ending:** {ann_metrics.year_endings[-1].date()}\n" + 
                          f"**Date Generated:** {date.today()}", 
                    border = 0, 
                    align = 'L',
@@ -234,27 +289,18 @@ def generate_pdf(about_data, ann_metrics, prop_id,
     post_analytics_title_y = pdf.y
 
     ##### Write in the benchmarking analytics table
-    # Create a copy of the annual metrics to format for displaying
-    if 'Weather Normalized Source Energy Use Intensity ' in ann_metrics.columns:
-        ann_metrics.rename(columns = {'Weather Normalized Source Energy Use Intensity ' : 'Weather Normalized Source Energy Use Intensity kBtu/ft²'}, 
-                            inplace = True)
-    plot_metrics_df = copy.deepcopy(ann_metrics)
+    # Create a dataframe of the annual metrics used in consultations to format for displaying
+    # The Water Score is only shown for Multifamily Housing properties
+    table_metrics = ['score', 'sourceIntensityWN', 'waterScore', 'waterIntensityTotal', 
+                     'totalLocationBasedGHGEmissions', 'totalLocationBasedGHGEmissionsIntensity']
     if about_data['prop_function'] != 'Multifamily Housing':
-        plot_metrics_df.drop(columns = ['Water Score (Multifamily Only)'], inplace = True)
-
-    ## Drop the columns that are not used in consultations
-    # Iterate through the possible columns for wnseu, if not available won't have units
-    for col in ['Weather Normalized Source Energy Use kBtu', 'Weather Normalized Source Energy Use ']:
-        if col in plot_metrics_df.columns:
-            plot_metrics_df.drop(columns = [col], inplace = True)
-    # Drop the National Median Source Energy Use and Total Water Use columns (units don't get pulled if there is no data)
-    plot_metrics_df = plot_metrics_df.loc[:,~plot_metrics_df.columns.str.contains('^National Median Source Energy Use', case=False)]
-    plot_metrics_df = plot_metrics_df.loc[:,~plot_metrics_df.columns.str.contains('^Total Water Use', case=False)]
+        table_metrics.remove('waterScore')
+    plot_metrics_df = pd.DataFrame({'Year Ending' : [x.strftime('%Y-%m-%d') for x in ann_metrics.year_endings], 
+                                    **{ann_metrics.label(name) : [ann_metrics.format(name, i) for i in range(len(ann_metrics))] 
+                                       for name in table_metrics}})
 
     # Format the dataframe to interate through and add to the pdf file
-    plot_metrics_df['Year Ending'] = [x.strftime('%Y-%m-%d') for x in plot_metrics_df['Year Ending']]
     plot_metrics_df =  plot_metrics_df.T.reset_index()
-    plot_metrics_df.replace(np.nan, 'N/A', inplace = True)
 
     # Set the font for the Benchmarking Analytics table
     pdf.set_font('Roboto', '', 5)
@@ -330,35 +376,9 @@ def generate_pdf(about_data, ann_metrics, prop_id,
         # After finishing the row, add a line break before adding the next row of data
         pdf.ln(line_height)
 
-    # Create a dictionary to hold the last year of the compliance period and their corresponding last digit of the LADBS Building ID
-    comp_periods = {'0' : 2025,
-                    '1' : 2025, 
-                    '2' : 2026, 
-                    '3' : 2026, 
-                    '4' : 2027, 
-                    '5' : 2027, 
-                    '6' : 2028, 
-                    '7' : 2028, 
-                    '8' : 2024, 
-                    '9' : 2024}
-    
-    # Check if the reissued dates are being used
-    # If they are, change the ids ending in 0, 1, 2, 3 to have a 2023 compliance year
-    if reissued_check:
-        comp_periods = {'0' : 2022,
-                        '1' : 2022, 
-                        '2' : 2022, 
-                        '3' : 2022, 
-                        '4' : 2022, 
-                        '5' : 2022, 
-                        '6' : 2023, 
-                        '7' : 2023, 
-                        '8' : 2024, 
-                        '9' : 2024}
-    
-    
     # Check if there is an LADBS Building ID, and if the last digit corresponds with the last year of the compliance period
-    if about_data['prop_la_id'] != 'None' and comp_periods[about_data['prop_la_id'][-1]] == int(year_ending):
+    # If the reissued dates are being used, the ids ending in 0, 1, 2, 3 have a 2022 compliance year
+    if is_compliance_year(about_data['prop_la_id'], year_ending, reissued_check):
         ## Add the EBEWE reduction metrics
 
         # Add the best reductions table's title
@@ -401,119 +421,14 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                  txt = 'Water Use Intensity')
 
         # Add the EBEWE reduction best shifts - WNSEUI Shift
-        
-        # Filter the monthly energy dataframe down to the years that will be used to compare to the compliance period
-        # i.e. the last month of the comparative period and the next 11 months
-        # If the reissued dates are being used, change the filter for the months that will be used
-        # to check if a satisfactory exemption is met
-        if reissued_check:
-            ## Need to create different masks for 0,1 and 2,3 (shifted one month)
-            if reissued_date == 'September 7, 2023':
-                energy_start_mask = (monthly_energy['End Date'] >= f'10-31-{year_ending}')
-                energy_end_mask = (monthly_energy['End Date'] <= f'8-31-{year_ending + 1}')
-                water_start_mask = (water_df['End Date'] >= f'10-31-{year_ending}')
-                water_end_mask = (water_df['End Date'] <= f'8-31-{year_ending + 1}')
-            elif reissued_date == 'October 7, 2023':
-                energy_start_mask = (monthly_energy['End Date'] >= f'11-30-{year_ending}')
-                energy_end_mask = (monthly_energy['End Date'] <= f'9-30-{year_ending + 1}')
-                water_start_mask = (water_df['End Date'] >= f'11-30-{year_ending}')
-                water_end_mask = (water_df['End Date'] <= f'9-30-{year_ending + 1}')
-            # If the ladbs id doesn't end in 0,1,2, or 3, then the comparative period remains the same
-            else:
-                energy_start_mask = (monthly_energy['End Date'] >= f'12-31-{year_ending}')
-                energy_end_mask = (monthly_energy['End Date'] <= f'11-30-{year_ending + 1}')
-                water_start_mask = (water_df['End Date'] >= f'12-31-{year_ending}')
-                water_end_mask = (water_df['End Date'] <= f'11-30-{year_ending + 1}')
-        else:
-            energy_start_mask = (monthly_energy['End Date'] >= f'12-31-{year_ending}')
-            energy_end_mask = (monthly_energy['End Date'] <= f'11-30-{year_ending + 1}')
-            water_start_mask = (water_df['End Date'] >= f'12-31-{year_ending}')
-            water_end_mask = (water_df['End Date'] <= f'11-30-{year_ending + 1}')
-
-        # Create a temp_df that holds the months that will be used to compare to the months in the comparative period
-        temp_df = monthly_energy.loc[energy_start_mask & energy_end_mask]
-        temp_df.reset_index(drop = True, inplace = True)
-
-        # Create a list to hold the eui info for each month/year for the baseline periods
-        eui_values = []
-        # For each available eui in the period we will compare, gather that months eui for the previous years
-        for index, row in temp_df.iterrows():
-            for i in range(1, 5):
-                eui_data = {}
-
-                eui_data['Recent Year'] = row['End Date'].year
-                eui_data['Recent Month'] = row['End Date'].month
-                eui_data['Recent WNSEUI'] = row['Weather Normalized Source EUI (kBtu/ft²)']
-
-                year_mask = (monthly_energy['End Date'].dt.year == (row['End Date'].year - i))
-                month_mask = (monthly_energy['End Date'].dt.month == row['End Date'].month)
-
-
-                eui_data['Comparative Year'] = row['End Date'].year - i
-                eui_data['Comparative Month'] = row['End Date'].month
-                # st.dataframe(monthly_energy.loc[year_mask & month_mask, 'Weather Normalized Source EUI (kBtu/ft²)'])
-                # print(monthly_energy.loc[year_mask & month_mask, 'Weather Normalized Source EUI (kBtu/ft²)'])
-                try:
-                    eui_data['Comparative WNSEUI'] = monthly_energy.loc[year_mask & month_mask, 'Weather Normalized Source EUI (kBtu/ft²)'].item()
-                except ValueError:
-                    eui_data['Comparative WNSEUI'] = np.nan
-                eui_values.append(eui_data)
-
-
-        # Create a dataframe of the EUI values     
-        comparative_eui_df = pd.DataFrame(eui_values)
-        # Crete a column that contains the shift from the baseline to the recent month
-        comparative_eui_df['EUI Shift'] = (comparative_eui_df['Recent WNSEUI'] - comparative_eui_df['Comparative WNSEUI']) / comparative_eui_df['Comparative WNSEUI']
-        # Sort the dataframe by the EUI shift and reset the index
-        comparative_eui_df.sort_values(by = 'EUI Shift', inplace = True)
-        comparative_eui_df.reset_index(drop = True, inplace = True)
-
-        # Get the best eui shift and the period (from and to)
-        best_eui_shift = round(comparative_eui_df.loc[0, 'EUI Shift'].item() * 100, 2)
-        best_eui_from = f"{calendar.month_abbr[comparative_eui_df.loc[0, 'Comparative Month'].item()]} {comparative_eui_df.loc[0, 'Comparative Year'].item()}"
-        best_eui_to = f"{calendar.month_abbr[comparative_eui_df.loc[0, 'Recent Month'].item()]} {comparative_eui_df.loc[0, 'Recent Year'].item()}"
-        
-        # Filter the monthly water dataframe down to the years that will be used to compare to the compliance period
-        # i.e. the last month of the comparative period and the next 11 months
-        temp_df = water_df.loc[water_start_mask & water_end_mask]
-        temp_df.reset_index(drop = True, inplace = True)
-
-        # Create a list to hold the wui info for each month/year for the baseline periods
-        wui_values = []
-        # For each available wui in the period we will compare, gather that months wui for the previous years
-        for index, row in temp_df.iterrows():
-            for i in range(1, 5):
-                wui_data = {}
-
-                wui_data['Recent Year'] = row['End Date'].year
-                wui_data['Recent Month'] = row['End Date'].month
-                wui_data['Recent WUI'] = row['Water Use Intensity']
-
-                year_mask = (water_df['End Date'].dt.year == (row['End Date'].year - i))
-                month_mask = (water_df['End Date'].dt.month == row['End Date'].month)
-
-
-                wui_data['Comparative Year'] = row['End Date'].year - i
-                wui_data['Comparative Month'] = row['End Date'].month
-                try:
-                    wui_data['Comparative WUI'] = water_df.loc[year_mask & month_mask, 'Water Use Intensity'].item()
-                except ValueError:
-                    wui_data['Comparative WUI'] = np.nan
-                wui_values.append(wui_data)
-
-
-        # Create a dataframe of the WUI values     
-        comparative_wui_df = pd.DataFrame(wui_values)
-        # Crete a column that contains the shift from the baseline to the recent month
-        comparative_wui_df['WUI Shift'] = (comparative_wui_df['Recent WUI'] - comparative_wui_df['Comparative WUI']) / comparative_wui_df['Comparative WUI']
-        # Sort the dataframe by the WUI shift and reset the index
-        comparative_wui_df.sort_values(by = 'WUI Shift', inplace = True)
-        comparative_wui_df.reset_index(drop = True, inplace = True)
-
-        # Get the best wui shift and the period (from and to)
-        best_wui_shift = round(comparative_wui_df.loc[0, 'WUI Shift'].item() * 100, 2)
-        best_wui_from = f"{calendar.month_abbr[comparative_wui_df.loc[0, 'Comparative Month'].item()]} {comparative_wui_df.loc[0, 'Comparative Year'].item()}"
-        best_wui_to = f"{calendar.month_abbr[comparative_wui_df.loc[0, 'Recent Month'].item()]} {comparative_wui_df.loc[0, 'Recent Year'].item()}"
+
+        # Get the months that will be used to compare to the months in the comparative period
+        # If the reissued dates are being used, the months are shifted for the reissued due date
+        window_start, window_end = comparative_window(year_ending, reissued_check, reissued_date)
+
+        # Get the best eui and wui shifts (from the same month in one of the previous years) and their periods (from and to)
+        best_eui = best_shift(monthly_energy, 'Weather Normalized Source EUI (kBtu/ft²)', window_start, window_end)
+        best_wui = best_shift(water_df, 'Water Use Intensity', window_start, window_end)
 
         # Old coloring
         # pdf.set_fill_color(93, 129, 119)
@@ -528,7 +443,7 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                  new_x = 'RIGHT',
                  new_y = 'TOP',
                  fill = True,
-                 txt = f'From {best_eui_from} to {best_eui_to}: {best_eui_shift}% shift')
+                 txt = format_shift(best_eui))
 
         # Add the EBEWE reduction best shifts - WUI Shift
         pdf.cell(w = pdf.epw / 2, 
@@ -538,15 +453,15 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                  new_x = 'RIGHT',
                  new_y = 'TOP',
                  fill = True,
-                 txt = f'From {best_wui_from} to {best_wui_to}: {best_wui_shift}% shift')
+                 txt = format_shift(best_wui))
 
      # If it is not the end of the building's compliance period,
      # Add the recent (last two years pulled) shift for WUI and WNSEUI 
     else:
         # Calculate the shifts for the WN SEUI and WUI for the most recent two years within the benchmarking metrics
-        latest_wnseui = float(ann_metrics['Weather Normalized Source Energy Use Intensity kBtu/ft²'].iloc[-1])
+        latest_wnseui = ann_metrics['sourceIntensityWN'][-1].item()
         try:
-            previous_wnseui = float(ann_metrics['Weather Normalized Source Energy Use Intensity kBtu/ft²'].iloc[-2])
+            previous_wnseui = ann_metrics['sourceIntensityWN'][-2].item()
         # If there is only one year of data, set the previous wnseui as the current
         except IndexError:
             previous_wnseui = latest_wnseui
@@ -555,10 +470,9 @@ def generate_pdf(about_data, ann_metrics, prop_id,
         except ZeroDivisionError:
             wnseui_shift = np.nan
 
-        # Using partial matching - may not have a water meter to pull the units used to create the column title
-        latest_wui = float(ann_metrics.filter(like = 'Water Use Intensity').iloc[-1])
+        latest_wui = ann_metrics['waterIntensityTotal'][-1].item()
         try:
-            previous_wui = float(ann_metrics.filter(like = 'Water Use Intensity').iloc[-2])
+            previous_wui = ann_metrics['waterIntensityTotal'][-2].item()
         except IndexError:
             previous_wui = latest_wui
         try:
@@ -618,9 +532,9 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                  txt = 'Water Use Intensity')
 
         # Add the EBEWE reduction recent shifts - WNSEUI
-        recent_year = ann_metrics['Year Ending'].iloc[-1].year
+        recent_year = ann_metrics.year_endings[-1].year
         try:
-            second_most_recent_year = ann_metrics['Year Ending'].iloc[-2].year
+            second_most_recent_year = ann_metrics.year_endings[-2].year
         # If there are not more than one year, set the second most recent year to the most recent year
         except IndexError:
             second_most_recent_year = recent_year
@@ -666,30 +580,12 @@ def generate_pdf(about_data, ann_metrics, prop_id,
             #  border = 1,
              fill = True)
 
-    # Generate and save the historical kbtu usage
-    # Create an image object to hold the figure
-    kbtu_buffer = io.BytesIO()
-    kbtu_plot = graph_eu(monthly_kbtu, about_data['prop_address'])
-    kbtu_plot.write_image(kbtu_buffer)
     # Plot the historical kbtu consumption
-    pdf.image(kbtu_buffer, 
-              w = pdf.epw, 
-              h = (pdf.eph / 2) * 0.9)
-
-    # Generate and save the historical water consumption
-    # Create an image object to hold the figure
-    hcf_consump_buff = io.BytesIO()
-    # Generate the plot
-    water_plot = graph_hcf(water_df, about_data['prop_address'])
-    # Check if the plot exists - if there is no water meter graph_hcf will return None
-    if water_plot is not None:
-        water_plot.write_image(hcf_consump_buff)
-        # Plot the historical water data
-        pdf.image(hcf_consump_buff,
-                  w = pdf.epw,
-                  h = (pdf.eph / 2) * 0.9)
-    # If there is no water consumption graph, write that there is no water meter
-    else:
+    place_chart(0)
+
+    # Plot the historical water data
+    # If there is no water consumption graph (there is no water meter), write that there is no water meter
+    if not place_chart(1):
         pdf.set_font('Roboto', '', 20)
         pdf.cell(w = 0, 
                  h = None,
@@ -713,24 +609,11 @@ def generate_pdf(about_data, ann_metrics, prop_id,
              fill = True)
 
     # Add the monthly Source Energy Use Intensity plot
-    seui_buff = io.BytesIO()
-    monthly_seui_plot = graph_seui(monthly_energy.loc[monthly_energy['End Date'] >= earliest_full_data(monthly_kbtu)])
-    monthly_seui_plot.write_image(seui_buff)
-    pdf.image(seui_buff, 
-              w = pdf.epw, 
-              h = (pdf.eph / 2) * 0.9)
+    place_chart(2)
 
     # Add the monthly energy star score
-    es_score_buff = io.BytesIO()
-    monthly_es_plot = graph_es_score(monthly_energy.loc[monthly_energy['End Date'] >= earliest_full_data(monthly_kbtu)])
-    # Check if there is a monthly ES plot - will return None if there is no historical ES scores
-    if monthly_es_plot is not None:
-        monthly_es_plot.write_image(es_score_buff)
-        pdf.image(es_score_buff, 
-                  w = pdf.epw, 
-                  h = (pdf.eph / 2) * 0.9)
-    # If there are no historical ES scores, write that the property does not qualify for an ES score
-    else:
+    # If there is no monthly ES plot (there are no historical ES scores), write that the property does not qualify for an ES score
+    if not place_chart(3):
         pdf.set_font('Roboto', '', 20)
         pdf.cell(w = 0, 
                  h = None,
@@ -753,16 +636,8 @@ def generate_pdf(about_data, ann_metrics, prop_id,
              fill = True)
 
     # Add the monthly consumption by electric meter
-    e_meter_buff = io.BytesIO()
-    monthly_e_meters = graph_e_meters_overlay(monthly_energy)
-    # Check if there is a monthly electric meter - monthly_e_meters will return None if there is no meter
-    if monthly_e_meters is not None:
-        monthly_e_meters.write_image(e_meter_buff)
-        pdf.image(e_meter_buff, 
-                  w = pdf.epw, 
-                  h = (pdf.eph / 2) * 0.9)
-    # If there is no plot, write that the property does not have an electric meter
-    else:
+    # If there is no plot (there is no electric meter), write that the property does not have an electric meter
+    if not place_chart(4):
         pdf.set_font('Roboto', '', 20)
         pdf.cell(w = 0, 
                  h = None,
@@ -771,16 +646,8 @@ def generate_pdf(about_data, ann_metrics, prop_id,
                  align = 'C')
 
     # Add the monthly consumption by gas meter
-    g_meter_buff = io.BytesIO()
-    monthly_g_meters = graph_g_meters_overlay(monthly_energy)
-    # Cehck if there is a monthly gas consumption plot - monthly_g_meters will return None if there is no gas meters
-    if monthly_g_meters is not None:
-        monthly_g_meters.write_image(g_meter_buff)
-        pdf.image(g_meter_buff, 
-                  w = pdf.epw, 
-                  h = (pdf.eph / 2) * 0.9)
-    # If there is no plot, write that the property does not contain a gas meter
-    else:
+    # If there is no plot (there are no gas meters), write that the property does not contain a gas meter
+    if not place_chart(5):
         pdf.set_font('Roboto', '', 20)
         pdf.cell(w = 0, 
                  h = None,
@@ -1,48 +1,39 @@
 # Import dependencies
-import requests
-import xmltodict
+import xml.etree.ElementTree as ET
 
 # Create a function to pull the about data
-def get_about_data(prop_id, domain, auth):
+def get_about_data(prop_id, client):
     # Get the property information for a given property id
-    prop_info = requests.get(domain + f'/property/{prop_id}',
-                        auth = auth)
-    # Parse the call into a dictionary
-    prop_info_dict = xmltodict.parse(prop_info.content)
-    
+    prop_info = client.get(f'/property/{prop_id}')
+    # Parse the call into an element tree
+    prop_info_root = ET.fromstring(prop_info.content)
+
     # Make a call to get the LA Building Id
-    prop_la_id_call = requests.get(domain + f'/property/{prop_id}/identifier/list', 
-                                   auth = auth)
-    # Parse the call into a dictionary
-    prop_la_id_dict = xmltodict.parse(prop_la_id_call.content)
+    prop_la_id_call = client.get(f'/property/{prop_id}/identifier/list')
+    # Parse the call into an element tree
+    prop_la_id_root = ET.fromstring(prop_la_id_call.content)
 
     # Create a dictionary to hold the property's about data
     about_data = {}
     # Parse the property information call and store the relevant about data within the dictionary
-    about_data['prop_name'] = prop_info_dict['property']['name']
-    about_data['prop_address'] = prop_info_dict['property']['address']['@address1']
-    about_data['prop_city'] = prop_info_dict['property']['address']['@city']
-    about_data['prop_postal_code'] = prop_info_dict['property']['address']['@postalCode']
-    about_data['prop_state'] = prop_info_dict['property']['address']['@state']
-    about_data['prop_function'] = prop_info_dict['property']['primaryFunction']
-    about_data['prop_sq_ft'] = prop_info_dict['property']['grossFloorArea']['value']
+    prop_address = prop_info_root.find('address')
+    about_data['prop_name'] = prop_info_root.findtext('name')
+    about_data['prop_address'] = prop_address.get('address1')
+    about_data['prop_city'] = prop_address.get('city')
+    about_data['prop_postal_code'] = prop_address.get('postalCode')
+    about_data['prop_state'] = prop_address.get('state')
+    about_data['prop_function'] = prop_info_root.findtext('primaryFunction')
+    about_data['prop_sq_ft'] = prop_info_root.findtext('grossFloorArea/value')
     about_data['prop_la_id'] = 'None'
     about_data['prop_ca_id'] = 'None'
 
-    # Check if the call for the LA Building ID was successful and appened the id if it did or None if it didn't
-    if prop_la_id_dict['additionalIdentifiers'] is not None:
-        # If there are more than one additional identifier, iterate through them to grab the LA building ID identifier
-        if type(prop_la_id_dict['additionalIdentifiers']['additionalIdentifier']) == list:
-            for i in range(len(prop_la_id_dict['additionalIdentifiers']['additionalIdentifier'])):
-                if prop_la_id_dict['additionalIdentifiers']['additionalIdentifier'][i]['additionalIdentifierType']['@name'] == 'Los Angeles Building ID':
-                    about_data['prop_la_id'] = prop_la_id_dict['additionalIdentifiers']['additionalIdentifier'][i]['value']
-                if prop_la_id_dict['additionalIdentifiers']['additionalIdentifier'][i]['additionalIdentifierType']['@name'] == 'California Building ID':
-                    about_data['prop_ca_id'] = prop_la_id_dict['additionalIdentifiers']['additionalIdentifier'][i]['value']
-        # If there is only one additional identifier, check if it is an LA building id and assign it as the property la id if it is
-        elif prop_la_id_dict['additionalIdentifiers']['additionalIdentifier']['additionalIdentifierType']['@name'] == 'Los Angeles Building ID':
-            about_data['prop_la_id'] = prop_la_id_dict['additionalIdentifiers']['additionalIdentifier']['value']
-        elif prop_la_id_dict['additionalIdentifiers']['additionalIdentifier']['additionalIdentifierType']['@name'] == 'California Building ID':
-            about_data['prop_ca_id'] = prop_la_id_dict['additionalIdentifiers']['additionalIdentifier']['value']
-        
+    # Iterate through the additional identifiers (if there are any) to grab the LA and CA building IDs
+    for identifier in prop_la_id_root.iter('additionalIdentifier'):
+        identifier_type = identifier.find('additionalIdentifierType').get('name')
+        if identifier_type == 'Los Angeles Building ID':
+            about_data['prop_la_id'] = identifier.findtext('value')
+        if identifier_type == 'California Building ID':
+            about_data['prop_ca_id'] = identifier.findtext('value')
+
     # Return the about_data dictionary
-    return about_data
\ No newline at end of file
+    return about_data
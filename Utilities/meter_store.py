@@ -0,0 +1,120 @@
+# Import dependencies
+from collections import namedtuple
+import numpy as np
+import pandas as pd
+
+# Create a named tuple to hold a meter's monthly series (from calendarize) and the fields describing the meter
+# The label is the name used for the meter in the graph legends
+MeterSeries = namedtuple('MeterSeries', ['meter_id', 'type', 'unit', 'label', 'end_dates', 'values'])
+
+
+# Create a long format store of the monthly meter values, with a row for each meter and month
+# Meter ids and months are stored as int32 keys, meter types and units as categoricals and values as float32
+# The rows are sorted by meter type and then month, so a type and date range is found with binary searches
+class MeterStore:
+
+    def __init__(self, meters):
+        # Store a row describing each meter (in the order the meters were given)
+        self.meters = pd.DataFrame({'meter_id' : np.array([meter.meter_id for meter in meters], dtype = np.int32),
+                                    'type' : pd.Categorical([meter.type for meter in meters]),
+                                    'unit' : pd.Categorical([meter.unit for meter in meters]),
+                                    'label' : [meter.label for meter in meters]})
+
+        # Create a row for each meter and month, with the month stored as the number of months since 1970-01
+        lengths = [len(meter.values) for meter in meters]
+        positions = np.repeat(np.arange(len(meters), dtype = np.int32), lengths)
+        months = np.concatenate([np.asarray(meter.end_dates, dtype = 'datetime64[M]').astype(np.int32) for meter in meters] +
+                                [np.empty(0, dtype = np.int32)])
+        values = np.concatenate([np.asarray(meter.values, dtype = np.float32) for meter in meters] +
+                                [np.empty(0, dtype = np.float32)])
+        type_codes = self.meters['type'].cat.codes.to_numpy()[positions]
+
+        # Sort the rows by meter type, then month, then meter
+        order = np.lexsort((positions, months, type_codes))
+        positions = positions[order]
+        self.data = pd.DataFrame({'meter_id' : self.meters['meter_id'].to_numpy()[positions],
+                                  'type' : pd.Categorical.from_codes(type_codes[order], self.meters['type'].cat.categories),
+                                  'unit' : pd.Categorical.from_codes(self.meters['unit'].cat.codes.to_numpy()[positions],
+                                                                     self.meters['unit'].cat.categories),
+                                  'month' : months[order],
+                                  'value' : values[order]})
+
+        # Index the start and stop rows for each meter type
+        sorted_codes = type_codes[order]
+        self.type_rows = {meter_type : (np.searchsorted(sorted_codes, code, 'left'), np.searchsorted(sorted_codes, code, 'right'))
+                          for code, meter_type in enumerate(self.meters['type'].cat.categories)}
+
+    def __len__(self):
+        return len(self.data)
+
+    def memory_usage(self):
+        # Return the bytes used by the stored rows and the meter descriptions
+        return int(self.data.memory_usage(deep = True).sum() + self.meters.memory_usage(deep = True).sum())
+
+    def select(self, meter_types = None, units = None, start = None, end = None):
+        # Return the positions of the rows for the given meter types and units with end dates from start to end (inclusive)
+        if meter_types is None:
+            meter_types = self.type_rows.keys()
+        elif isinstance(meter_types, str):
+            meter_types = [meter_types]
+
+        # A month is included if its month end falls within the dates
+        first_month = np.datetime64(pd.Timestamp(start), 'M').astype(np.int32) if start is not None else None
+        last_month = ((np.datetime64(pd.Timestamp(end), 'D') + 1).astype('datetime64[M]') - 1).astype(np.int32) if end is not None else None
+
+        # Binary search each meter type's rows (which are sorted by month) for the date range
+        months = self.data['month'].to_numpy()
+        rows = []
+        for meter_type in meter_types:
+            type_start, type_stop = self.type_rows.get(meter_type, (0, 0))
+            if first_month is not None:
+                type_start = type_start + np.searchsorted(months[type_start:type_stop], first_month, 'left')
+            if last_month is not None:
+                type_stop = type_start + np.searchsorted(months[type_start:type_stop], last_month, 'right')
+            rows.append(np.arange(type_start, max(type_start, type_stop)))
+        rows = np.concatenate(rows + [np.empty(0, dtype = np.int64)])
+
+        # Filter the rows by units
+        if units is not None:
+            if isinstance(units, str):
+                units = [units]
+            rows = rows[np.isin(self.data['unit'].to_numpy()[rows], units)]
+        return rows
+
+    def query(self, meter_types = None, units = None, start = None, end = None):
+        # Return the long format rows for the given meter types, units and dates, with an End Date for each month
+        rows = self.select(meter_types, units, start, end)
+        result = self.data.iloc[rows].reset_index(drop = True)
+        result.insert(3, 'End Date', month_end_dates(result['month'].to_numpy()))
+        return result
+
+    def wide(self, meter_types = None, units = None, start = None, end = None):
+        # Return a dataframe with an End Date column (most recent month first) and a column for each meter's values,
+        # with NaN where a meter does not have a value for the month
+        rows = self.select(meter_types, units, start, end)
+        meter_ids = self.data['meter_id'].to_numpy()[rows]
+        months = self.data['month'].to_numpy()[rows]
+
+        # Get the meters with any values (in the order the meters were given) and the months with any values
+        meter_positions = pd.Index(self.meters['meter_id']).get_indexer(meter_ids)
+        unique_positions = np.unique(meter_positions)
+        unique_months = np.unique(months)
+
+        # Fill each value into the row of its month (most recent month first) and the column of its meter
+        values = np.full((len(unique_months), len(unique_positions)), np.nan)
+        values[len(unique_months) - 1 - np.searchsorted(unique_months, months),
+               np.searchsorted(unique_positions, meter_positions)] = self.data['value'].to_numpy()[rows]
+
+        wide_df = pd.DataFrame(values, columns = self.meters['label'].to_numpy()[unique_positions])
+        wide_df.insert(0, 'End Date', month_end_dates(unique_months[::-1]))
+        return wide_df
+
+    def month_ends(self):
+        # Return the end dates of the months with any meter values, with the most recent month first
+        return pd.Series(month_end_dates(np.unique(self.data['month'].to_numpy())[::-1]), name = 'End Date')
+
+
+# Create a function to convert months since 1970-01 to their month end dates
+def month_end_dates(months):
+    months = np.asarray(months).astype('datetime64[M]')
+    return ((months + 1).astype('datetime64[D]') - 1).astype('datetime64[ns]')
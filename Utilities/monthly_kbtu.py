@@ -0,0 +1,62 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+from Utilities.unit_conversions import SITE_KBTU_FACTORS
+from Utilities.meter_store import month_end_dates
+
+# Set the kBtu columns in the order of the monthly kbtu dataframe
+KBTU_COLUMNS = ['Electric kBtu', 'Gas kBtu']
+
+
+# Create a function to derive the monthly electric and gas kBtu consumption from the calendarized energy meter data
+# Returns the same dataframe as pull_prop_data pulls from ESPM's monthly metrics - the 12 months of the year ending
+# and the previous four years (sorted by End Date), with NaN where no meter of the fuel has consumption for the month
+def derive_monthly_kbtu(energy_meters, year_ending):
+    # Get the meter values for the meter types with site energy factors within the five years
+    meter_values = energy_meters.query(meter_types = list(SITE_KBTU_FACTORS),
+                                       start = f'1-1-{year_ending - 4}',
+                                       end = f'12-31-{year_ending}')
+
+    # Convert each value to kBtu and get the column it is added to from its meter type
+    meter_types = meter_values['type'].astype(str).to_numpy()
+    factors = np.array([SITE_KBTU_FACTORS[meter_type][1] for meter_type in meter_types], dtype = np.float64)
+    columns = np.array([KBTU_COLUMNS.index(SITE_KBTU_FACTORS[meter_type][0]) for meter_type in meter_types], dtype = np.int64)
+    kbtu_values = meter_values['value'].to_numpy(dtype = np.float64) * factors
+
+    # Sum the kBtu for each month and column, and set the months without any meter of the fuel to NaN
+    first_month = (year_ending - 4 - 1970) * 12
+    month_positions = meter_values['month'].to_numpy() - first_month
+    totals = np.zeros((60, len(KBTU_COLUMNS)))
+    counts = np.zeros((60, len(KBTU_COLUMNS)), dtype = np.int64)
+    np.add.at(totals, (month_positions, columns), kbtu_values)
+    np.add.at(counts, (month_positions, columns), 1)
+    totals[counts == 0] = np.nan
+
+    kbtu_df = pd.DataFrame(totals, columns = KBTU_COLUMNS)
+    kbtu_df.insert(0, 'End Date', month_end_dates(first_month + np.arange(60)))
+
+    # Drop the rows that have neither gas nor electric consumption
+    kbtu_df.dropna(thresh = 2, inplace = True)
+    return kbtu_df.reset_index(drop = True)
+
+
+# Create a function to compare the derived monthly kBtu consumption to the consumption pulled from ESPM
+# Returns a dataframe of the months where either fuel differs by more than the tolerance (as a fraction of ESPM's value),
+# or is missing from only one of the two
+def reconcile_monthly_kbtu(derived_kbtu, api_kbtu, tolerance = 0.01):
+    comparison = pd.merge(derived_kbtu, api_kbtu, on = 'End Date', how = 'outer', suffixes = (' (Meters)', ' (ESPM)'))
+    comparison.sort_values(by = 'End Date', inplace = True)
+
+    mismatched = np.zeros(len(comparison), dtype = bool)
+    for col in KBTU_COLUMNS:
+        derived = comparison[f'{col} (Meters)'].to_numpy(dtype = np.float64)
+        api = comparison[f'{col} (ESPM)'].to_numpy(dtype = np.float64)
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            difference = np.abs(derived - api) / np.abs(api)
+        comparison[f'{col} Difference'] = difference
+        # A month is mismatched if only one has a value, or the difference is over the tolerance
+        # (a zero ESPM value only matches a zero derived value)
+        mismatched |= np.isnan(derived) != np.isnan(api)
+        mismatched |= ~np.isnan(derived) & ~np.isnan(api) & ~(difference <= tolerance) & (derived != api)
+
+    return comparison.loc[mismatched].reset_index(drop = True)
@@ -0,0 +1,249 @@
+# Import dependencies
+from collections import namedtuple
+import math
+import numpy as np
+import pandas as pd
+
+# Create named tuples to hold a chart's line series and the chart itself
+# dash is True for dashed lines and markers is False for lines without markers
+LineSeries = namedtuple('LineSeries', ['name', 'x', 'y', 'color', 'dash', 'markers'])
+Chart = namedtuple('Chart', ['title', 'y_title', 'series'])
+
+# Set the colors used by the plotly charts (plotly's named colors and its qualitative color sequence for the meters)
+BLUE = (0, 0, 255)
+RED = (255, 0, 0)
+GREEN = (0, 128, 0)
+METER_COLORS = [(99, 110, 250), (239, 85, 59), (0, 204, 150), (171, 99, 250), (255, 161, 90),
+                (25, 211, 243), (255, 102, 146), (182, 232, 128), (255, 151, 255), (254, 203, 82)]
+
+# Set the colors of plotly's default template - a light blue plot area with white grid lines
+PLOT_BACKGROUND = (229, 236, 246)
+GRID_COLOR = (255, 255, 255)
+TEXT_COLOR = (42, 63, 95)
+
+# Set the size of the plotly figures (in px) that the chart layout is scaled from
+FIGURE_WIDTH = 700
+FIGURE_MARGINS = {'l' : 80, 'r' : 80, 't' : 100, 'b' : 80}
+
+
+###################################
+###################################
+# Create the chart functions for the PDF charts - each one matches the plotly chart of the same name in plot_metrics,
+# returning None where the plotly function returns None
+
+# Create a function to chart the monthly consumption for electric and gas (graph_eu)
+def eu_chart(kbtu_df, prop_name):
+    series = []
+    if not kbtu_df['Electric kBtu'].isnull().all():
+        series.append(LineSeries('Electric kBtu', kbtu_df['End Date'], kbtu_df['Electric kBtu'], BLUE, False, True))
+    if not kbtu_df['Gas kBtu'].isnull().all():
+        series.append(LineSeries('Gas kBtu', kbtu_df['End Date'], kbtu_df['Gas kBtu'], RED, False, True))
+    return Chart(f'{prop_name}<br>MONTHLY ENERGY CONSUMPTION (kBtu)', 'Consumption (kBtu)', series)
+
+
+# Create a function to chart the historical water meter usage (graph_hcf)
+def hcf_chart(water_meters, prop_name):
+    if water_meters is None:
+        return None
+    water_df = water_meters.wide()
+    if len(water_meters.meters) > 1:
+        water_df.insert(1, 'Total HCF Consumption', water_df.sum(axis = 1, numeric_only = True))
+    usage_columns = list(water_df.columns[1:])
+    if not usage_columns:
+        return None
+    return Chart('WATER METER MONTHLY CONSUMPTION', 'Consumption (HCF)', meter_series(water_df, usage_columns))
+
+
+# Create a function to chart the historical energy star scores (graph_es_score)
+def es_score_chart(energy_df):
+    if energy_df['Energy Star Score'].isnull().all():
+        return None
+    return Chart('MONTHLY ENERGY STAR SCORE', 'ENERGY STAR Score',
+                 [LineSeries('ENERGY STAR Score', energy_df['End Date'], energy_df['Energy Star Score'], BLUE, False, True),
+                  LineSeries('ENERGY STAR Score Target', energy_df['End Date'], [75] * len(energy_df['End Date']), GREEN, True, False)])
+
+
+# Create a function to chart the WNSEUI and the National Median source eui (graph_seui)
+# Like the plotly chart, the end dates start from the row labelled 11 and are paired with the values from the first row
+def seui_chart(energy_df):
+    end_dates = energy_df.loc[11:, 'End Date']
+    return Chart('MONTHLY OVERALL ENERGY USAGE ON A SQ. FT. BASIS<br>MONTHLY ENERGY USE VS. NATIONAL MEDIAN COMPARISON (SOURCE EUI)',
+                 'Energy Use Intensity (kBtu/ft²)',
+                 [LineSeries('Building Energy Use Intensity (EUI)', end_dates,
+                             energy_df['Weather Normalized Source EUI (kBtu/ft²)'].iloc[:len(end_dates)], BLUE, False, True),
+                  LineSeries('National Median Source EUI', end_dates,
+                             energy_df['National Median Source EUI (kBtu/ft²)'].iloc[:len(end_dates)], RED, False, True)])
+
+
+# Create a function to chart the electric meters monthly consumption (graph_e_meters_overlay)
+def e_meters_chart(energy_meters):
+    energy_df = energy_meters.wide(units = 'kWh')
+    usage_columns = list(energy_df.columns[1:])
+    if not usage_columns:
+        return None
+    return Chart('MONTHLY ELECTRIC METER CONSUMPTION (kWh)', 'kWh Consumption', meter_series(energy_df, usage_columns))
+
+
+# Create a function to chart the gas meters monthly consumption (graph_g_meters_overlay)
+def g_meters_chart(energy_meters):
+    energy_df = energy_meters.wide(units = 'therms')
+    usage_columns = list(energy_df.columns[1:])
+    if not usage_columns:
+        return None
+    return Chart('MONTHLY GAS METER CONSUMPTION (Therms)', 'Therm Consumption', meter_series(energy_df, usage_columns))
+
+
+# Create a helper function to create a line series for each meter column, colored in the same order as the plotly charts
+def meter_series(meter_df, usage_columns):
+    return [LineSeries(col, meter_df['End Date'], meter_df[col], METER_COLORS[count % (len(METER_COLORS) - 1)], False, True)
+            for count, col in enumerate(usage_columns)]
+
+
+###################################
+###################################
+# Create a helper function to get around 6 evenly spaced round tick values (1, 2 or 5 times a power of 10) covering lo to hi
+def nice_ticks(lo, hi, count = 6):
+    if hi <= lo:
+        lo, hi = lo - 1, hi + 1
+    raw_step = (hi - lo) / count
+    magnitude = 10 ** math.floor(math.log10(raw_step))
+    step = next(factor * magnitude for factor in (1, 2, 5, 10) if factor * magnitude >= raw_step)
+    return np.arange(math.ceil(lo / step) * step, hi + step * 1e-9, step)
+
+
+# Create a helper function to format an axis' tick values like plotly (i.e. 1.5M, 200k, 8000, 75)
+# Like plotly, the SI suffixes are only used once the axis reaches 10k
+def format_ticks(ticks):
+    largest = max(abs(tick) for tick in ticks) if len(ticks) else 0
+    for divisor, suffix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+        if largest >= 10 * divisor or (divisor > 1e3 and largest >= divisor):
+            return [f'{tick / divisor:g}{suffix}' for tick in ticks]
+    return [f'{tick:g}' for tick in ticks]
+
+
+# Create a helper function to get the month start tick dates between two dates, with a step of 1, 2, 3, 6 or 12+ months
+def date_ticks(start, end, count = 8):
+    months = (end.year - start.year) * 12 + end.month - start.month + 1
+    step = next((step for step in (1, 2, 3, 6) if months / step <= count), 12 * math.ceil(months / 12 / count))
+    # Start the ticks on a January, on a year that is a multiple of the step for steps of more than a year
+    first = pd.Timestamp(year = start.year - start.year % max(1, step // 12), month = 1, day = 1)
+    ticks = pd.date_range(first, end, freq = f'{step}MS')
+    ticks = ticks[ticks >= start]
+    labels = [tick.strftime('%Y') if step >= 12 else tick.strftime('%b %Y') for tick in ticks]
+    return ticks, labels
+
+
+# Create a function to draw a chart onto the pdf in the box at (x, y) with width w and height h (in the pdf's units)
+# The layout follows plotly's default template - the title at the top left, a light blue plot area with white grid lines,
+# the y axis title on the left and a horizontal legend below the x axis
+def draw_chart(pdf, chart, x, y, w, h, font_family = 'helvetica'):
+    # Scale plotly's px sizes to the box
+    px = w / FIGURE_WIDTH
+    font_size = lambda size_px: size_px * px * pdf.k
+
+    series = [line for line in chart.series if len(line.x)]
+    x_values = [pd.DatetimeIndex(line.x) for line in series]
+    y_values = [np.asarray(line.y, dtype = np.float64) for line in series]
+
+    with pdf.local_context():
+        # Lay out the legend rows first so the plot area can make room for them
+        pdf.set_font(font_family, '', font_size(12))
+        legend_items = [(line, 40 * px + pdf.get_string_width(line.name)) for line in series]
+        legend_rows = [[]]
+        row_width = 0
+        for item in legend_items:
+            if legend_rows[-1] and row_width + item[1] > w - (FIGURE_MARGINS['l'] + FIGURE_MARGINS['r']) * px:
+                legend_rows.append([])
+                row_width = 0
+            legend_rows[-1].append(item)
+            row_width += item[1]
+
+        plot_left = x + FIGURE_MARGINS['l'] * px
+        plot_right = x + w - FIGURE_MARGINS['r'] * px
+        plot_top = y + FIGURE_MARGINS['t'] * px
+        plot_bottom = y + h - (FIGURE_MARGINS['b'] - 40 + 20 * len(legend_rows)) * px
+
+        # Draw the title (plotly uses <br> for its line breaks)
+        pdf.set_text_color(*TEXT_COLOR)
+        pdf.set_font(font_family, '', font_size(17))
+        for line_number, title_line in enumerate(chart.title.split('<br>')):
+            pdf.text(x + 0.05 * w, y + (30 + 22 * line_number) * px, title_line)
+
+        # Draw the plot area
+        pdf.set_fill_color(*PLOT_BACKGROUND)
+        pdf.rect(plot_left, plot_top, plot_right - plot_left, plot_bottom - plot_top, style = 'F')
+
+        # Get the axis ranges, padded like plotly pads lines with markers
+        all_y = np.concatenate(y_values + [np.empty(0)])
+        all_y = all_y[~np.isnan(all_y)]
+        if len(all_y) == 0:
+            return
+        y_lo, y_hi = all_y.min(), all_y.max()
+        y_pad = (y_hi - y_lo) * 0.05 if y_hi > y_lo else 1
+        y_lo, y_hi = y_lo - y_pad, y_hi + y_pad
+        x_lo = min(dates.min() for dates in x_values)
+        x_hi = max(dates.max() for dates in x_values)
+        x_pad = (x_hi - x_lo) * 0.02 if x_hi > x_lo else pd.Timedelta(days = 15)
+        x_lo, x_hi = x_lo - x_pad, x_hi + x_pad
+
+        x_scale = (plot_right - plot_left) / ((x_hi - x_lo) / pd.Timedelta(days = 1))
+        y_scale = (plot_bottom - plot_top) / (y_hi - y_lo)
+        to_x = lambda dates: plot_left + ((dates - x_lo) / pd.Timedelta(days = 1)) * x_scale
+        to_y = lambda values: plot_bottom - (values - y_lo) * y_scale
+
+        # Draw the grid lines and tick labels
+        pdf.set_draw_color(*GRID_COLOR)
+        pdf.set_line_width(px)
+        pdf.set_font(font_family, '', font_size(12))
+        y_ticks = nice_ticks(y_lo, y_hi)
+        for tick, label in zip(y_ticks, format_ticks(y_ticks)):
+            tick_y = to_y(tick)
+            pdf.line(plot_left, tick_y, plot_right, tick_y)
+            pdf.text(plot_left - 6 * px - pdf.get_string_width(label), tick_y + 4 * px, label)
+        ticks, labels = date_ticks(x_lo, x_hi)
+        for tick, label in zip(ticks, labels):
+            tick_x = to_x(tick)
+            pdf.line(tick_x, plot_top, tick_x, plot_bottom)
+            pdf.text(tick_x - pdf.get_string_width(label) / 2, plot_bottom + 18 * px, label)
+
+        # Draw the y axis title, rotated along the left of the plot area
+        pdf.set_font(font_family, '', font_size(14))
+        title_x = x + 25 * px
+        title_y = (plot_top + plot_bottom) / 2 + pdf.get_string_width(chart.y_title) / 2
+        with pdf.rotation(90, title_x, title_y):
+            pdf.text(title_x, title_y, chart.y_title)
+
+        # Draw each series as lines broken at the missing values, with a marker on each value
+        pdf.set_line_width(2 * px)
+        for line, dates, values in zip(series, x_values, y_values):
+            points_x = to_x(dates)
+            points_y = to_y(values)
+            present = ~np.isnan(values)
+            pdf.set_draw_color(*line.color)
+            pdf.set_fill_color(*line.color)
+            pdf.set_dash_pattern(dash = 6 * px, gap = 4 * px) if line.dash else pdf.set_dash_pattern()
+            # Split the points into runs of present values
+            breaks = np.flatnonzero(np.diff(present.astype(np.int8)) != 0) + 1
+            for run in np.split(np.arange(len(values)), breaks):
+                if len(run) > 1 and present[run[0]]:
+                    pdf.polyline(list(zip(points_x[run], points_y[run])))
+            pdf.set_dash_pattern()
+            if line.markers:
+                for point_x, point_y in zip(points_x[present], points_y[present]):
+                    pdf.ellipse(point_x - 3 * px, point_y - 3 * px, 6 * px, 6 * px, style = 'F')
+
+        # Draw the legend rows below the x axis
+        pdf.set_font(font_family, '', font_size(12))
+        for row_number, row in enumerate(legend_rows):
+            item_x = plot_left
+            item_y = plot_bottom + (40 + 20 * row_number) * px
+            for line, item_width in row:
+                pdf.set_draw_color(*line.color)
+                pdf.set_fill_color(*line.color)
+                pdf.set_dash_pattern(dash = 6 * px, gap = 4 * px) if line.dash else pdf.set_dash_pattern()
+                pdf.line(item_x, item_y, item_x + 30 * px, item_y)
+                pdf.set_dash_pattern()
+                if line.markers:
+                    pdf.ellipse(item_x + 12 * px, item_y - 3 * px, 6 * px, 6 * px, style = 'F')
+                pdf.text(item_x + 35 * px, item_y + 4 * px, line.name)
+                item_x += item_width
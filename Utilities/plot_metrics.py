@@ -40,72 +40,42 @@ def graph_eu(kbtu_df, prop_name):
 ###################################
 ###################################
 # Create a function to graph historical water meter usage
-def graph_hcf(water_df, prop_name):
-    # Check if a water_df was creted (would not get created without water meters)
-    if water_df is not None:
-        # Check to see if there is only one water meter - will have two columns - date and usage
-        if water_df.shape[1] == 2:
-            # Graphing the historical meter usage
-            hcf_trace_1 = go.Scatter(
-                    x = water_df['End Date'],
-                    y = water_df['Usage (HCF)'],
-                    name = 'HCF Consumption',
-                    mode = 'lines+markers', 
-                    marker_color = 'blue', 
-                    hovertemplate = 'Month: %{x}<br>Consumption: %{y:,.0f} HCF<extra></extra>')
-
-            hcf_trace_2 = go.Scatter(
-                    x = water_df['End Date'],
-                    y = [water_df['Usage (HCF)'].mean()] * len(water_df['End Date']),
-                    name = 'Monthly Average',
-                    line_dash = 'dash',
-                    mode = 'lines', 
-                    marker_color = 'red', 
-                    hovertemplate = 'Monthly Average: %{y:,.1f} HCF<extra></extra>')
-
-            data = [hcf_trace_1, hcf_trace_2]
-
-            hcf_fig = go.Figure(data = data)
-
-            hcf_fig.update_layout(title = f'{prop_name}<br>MONTHLY WATER CONSUMPTION (HCF)', 
-                                  yaxis_title = 'Consumption (HCF)', 
-                                  yaxis_tickformat = '%{text:,}', 
-                                  font_family = 'Arial',
-                                  legend=dict(orientation="h"))
-            # Return the hcf fig
-            return hcf_fig
-        
-        # If there were more than one water meter, plot the water meters by meter
+def graph_hcf(water_meters, prop_name):
+    # Check if a water meter store was created (would not get created without water meters)
+    if water_meters is not None:
+        # Get the monthly consumption with a column for each water meter
+        water_df = water_meters.wide()
+
+        # If there is more than one water meter, insert a total water consumption column
+        if len(water_meters.meters) > 1:
+            water_df.insert(1, 'Total HCF Consumption', water_df.sum(axis = 1, numeric_only = True))
+
+        # Get a list of the water meter columns to plot
+        usage_columns = list(water_df.columns[1:])
+
+        fig = go.Figure()
+        colors = px.colors.qualitative.Plotly
+        for count, col in enumerate(usage_columns):
+            fig.add_trace(go.Scatter(x = water_df['End Date'],
+                                     y = water_df[col],
+                                     name = col,
+                                     mode = 'lines+markers',
+                                     marker_color = colors[count % (len(colors) - 1)],
+                                     hovertemplate = '%{y:,.0f} HCF'))
+
+        fig.update_layout(
+                        hovermode = 'x unified', 
+                        title = 'WATER METER MONTHLY CONSUMPTION', 
+                        yaxis_title = 'Consumption (HCF)',
+                        font_family = 'Arial', 
+                        legend=dict(orientation="h"))
+
+        # Check if anything was plotted, if so return the figure, if not return None
+        if usage_columns:
+            return fig
         else:
-            # Get a list of the water meter columns to plot
-            usage_columns = []
-            for col in water_df.columns:
-                if 'HCF' in col:
-                    usage_columns.append(col)
-
-            fig = go.Figure()
-            colors = px.colors.qualitative.Plotly
-            for count, col in enumerate(usage_columns):
-                fig.add_trace(go.Scatter(x = water_df.dropna(subset = usage_columns, how = 'all')['End Date'],
-                                         y = water_df.dropna(subset = usage_columns, how = 'all')[col],
-                                         name = col,
-                                         mode = 'lines+markers',
-                                         marker_color = colors[count % (len(colors) - 1)],
-                                         hovertemplate = '%{y:,.0f} HCF'))
-
-            fig.update_layout(
-                            hovermode = 'x unified', 
-                            title = 'WATER METER MONTHLY CONSUMPTION', 
-                            yaxis_title = 'Consumption (HCF)',
-                            font_family = 'Arial', 
-                            legend=dict(orientation="h"))
-
-            # Check if anything was plotted, if so return the figure, if not return None
-            if usage_columns:
-                return fig
-            else:
-                return None
-    # Return None if a water df was never created
+            return None
+    # Return None if a water meter store was never created
     else:
         return None
         
@@ -179,19 +149,17 @@ def graph_seui(energy_df):
 ###################################
 ###################################
 # Create a function to graph the electric meters monthly consumption
-def graph_e_meters_overlay(energy_df):
-    # Get a list of the electric meter columns to plot
-    usage_columns = []
-    for col in energy_df.columns:
-        if 'kWh' in col:
-            usage_columns.append(col)
+def graph_e_meters_overlay(energy_meters):
+    # Get the monthly consumption with a column for each electric meter (the meters in kWh)
+    energy_df = energy_meters.wide(units = 'kWh')
+    usage_columns = list(energy_df.columns[1:])
             
     fig = go.Figure()
-    # Iterate through the columns that contain kWh and create a trace for each one
+    # Iterate through the electric meter columns and create a trace for each one
     colors = px.colors.qualitative.Plotly
     for count, col in enumerate(usage_columns):
-        fig.add_trace(go.Scatter(x = energy_df.dropna(subset = usage_columns, how = 'all')['End Date'],
-                                 y = energy_df.dropna(subset = usage_columns, how = 'all')[col],
+        fig.add_trace(go.Scatter(x = energy_df['End Date'],
+                                 y = energy_df[col],
                                  name = col,
                                  mode = 'lines+markers',
                                  marker_color = colors[count % (len(colors) - 1)],
@@ -212,19 +180,17 @@ def graph_e_meters_overlay(energy_df):
 ###################################
 ###################################
 # Create a function to graph the gas meters monthly consumption
-def graph_g_meters_overlay(energy_df):
-    # Get a list of the electric meter columns to plot
-    usage_columns = []
-    for col in energy_df.columns:
-        if 'therm' in col:
-            usage_columns.append(col)
+def graph_g_meters_overlay(energy_meters):
+    # Get the monthly consumption with a column for each gas meter (the meters in therms)
+    energy_df = energy_meters.wide(units = 'therms')
+    usage_columns = list(energy_df.columns[1:])
             
     fig = go.Figure()
-    # Iterate through the columns that contain 'therm' and create a trace for each to plot
+    # Iterate through the gas meter columns and create a trace for each to plot
     colors = px.colors.qualitative.Plotly
     for count, col in enumerate(usage_columns):
-        fig.add_trace(go.Scatter(x = energy_df.dropna(subset = usage_columns, how = 'all')['End Date'],
-                                 y = energy_df.dropna(subset = usage_columns, how = 'all')[col],
+        fig.add_trace(go.Scatter(x = energy_df['End Date'],
+                                 y = energy_df[col],
                                  name = col,
                                  mode = 'lines+markers',
                                  marker_color = colors[count % (len(colors) - 1)],
@@ -1,165 +1,51 @@
 # Import dependencies
-import requests
-import xmltodict
-import pandas as pd
-from calendar import monthrange
+from Utilities.consumption_store import sync_consumption
+from Utilities.espm_xml import parse_meter, parse_meter_associations
+from Utilities.calendarize import calendarize_entries
+from Utilities.meter_store import MeterSeries, MeterStore
+from Utilities.unit_conversions import standard_units, conversion_factor
 
 
-# Make a volume converter to handle standardize the meter entries to be graphed together
-class VolumeConverter:
-    @staticmethod
-    def convert(value, meter_type, current_units, conversions):
-        conversion_factor = conversions[meter_type][current_units]
-        return float(value) * conversion_factor
-
-
-def pull_monthly_energy(prop_id, domain, auth): 
-    # Add a conversions table to standardize the meter data before plotting it
-    conversions = {
-            'Electric': {
-                'kWh (thousand Watt-hours)' : 1, 
-                '(kBtu (thousand Btu))' : 0.000293071,
-                'kBtu (thousand Btu)' : 0.000293071
-            },
-            'Electric on Site Solar' : {
-                '(kWh (thousand Watt-hours))' : -1, 
-                'kWh (thousand Watt-hours)' : -1, 
-                '(MWh (million Watt-hours))' : -0.001,
-                'MWh (million Watt-hours)' : -0.001
-            },
-            'Natural Gas': {
-                'therms' : 1,
-                '(kBtu (thousand Btu))' : 0.010002388,
-                'kBtu (thousand Btu)' : 0.010002388,
-                '(MBtu (million Btu))' : 10.002388,
-                'MBtu (million Btu)' : 10.002388,
-                'ccf (hundred cubic feet)' : 1.037
-            },
-            'Propane': {
-                'cf (cubic feet)' : 0.02565826330532213, 
-                'Gallons (US)' : 0.916
-            }, 
-            'Municipally Supplied Potable Water - Indoor': {
-                'ccf (hundred cubic feet)' : 0.748052,
-                'KGal (thousand gallons) (US)' : 1
-            },
-            'Municipally Supplied Potable Water - Outdoor': {
-                'ccf (hundred cubic feet)' : 0.748052,
-                'KGal (thousand gallons) (US)' : 1
-            },
-            'Municipally Supplied Potable Water - Mixed Indoor/Outdoor': {
-                'ccf (hundred cubic feet)' : 0.748052,
-                '(cf (cubic feet))' : 0.00748052,
-                'cf (cubic feet)' : 0.00748052,
-                'Gallons (US)' : 1,
-                'cGal (hundred gallons) (US)' : .1,
-                'kcf (thousand cubic feet)' : 7.48052,
-                'KGal (thousand gallons) (US)' : 1
-            }, 
-            'Municipally Supplied Reclaimed Water - Outdoor' : {
-                '(ccf (hundred cubic feet))' : 0.748052,
-                'ccf (hundred cubic feet)' : 0.748052,
-                'KGal (thousand gallons) (US)' : 1
-            }, 
-            'Municipally Supplied Reclaimed Water - Mixed Indoor/Outdoor' : {
-                '(ccf (hundred cubic feet))' : 0.748052,
-                'ccf (hundred cubic feet)' : 0.748052,
-                'KGal (thousand gallons) (US)' : 1
-            }
-        }
-
-    # Create a dictionary to hold the mappings for the standard units for each meter type
-    standard_units = {
-        'Electric': 'kWh',
-        'Electric on Site Solar' : 'kWh',
-        'Municipally Supplied Potable Water - Indoor': 'Gallons',
-        'Municipally Supplied Reclaimed Water - Mixed Indoor/Outdoor': 'Gallons',
-        'Municipally Supplied Potable Water - Outdoor': 'Gallons',
-        'Municipally Supplied Potable Water - Mixed Indoor/Outdoor': 'Gallons',
-        'Natural Gas': 'therms',
-        'Propane': 'therms'
-    }
+def pull_monthly_energy(prop_id, client, consumption_store = None, full_sync = False): 
     # Make a call to get the meter associations for the property   
-    meter_associations = requests.get(domain + f'/association/property/{prop_id}/meter', 
-                                      auth = auth)
+    meter_associations = client.get(f'/association/property/{prop_id}/meter')
 
-    # Parse the meter associations call into a dictionary
-    meter_assoc_dict = xmltodict.parse(meter_associations.content)
+    # Parse the energy meter ids from the meter associations call to use for calls for consumption
+    energy_meters, _ = parse_meter_associations(meter_associations.content)
 
-    # Get a list of the energy meters ids to use for calls for consumption
-    energy_meters = meter_assoc_dict['meterPropertyAssociationList']['energyMeterAssociation']['meters']['meterId']
-    # If there is more than one energy meter - continue, else put the energy meter into a list to iterate through
-    if type(energy_meters) == list:
-        pass
-    else:
-        energy_meters = [meter_assoc_dict['meterPropertyAssociationList']['energyMeterAssociation']['meters']['meterId']]
+    # Initialize an empty list to store each meter's monthly series
+    meter_series = []
 
-    # Initialize an empty list to store dataframes
-    meter_dataframes = []
+    # Sync and calendarize the consumption data for every energy meter on the client's thread pool,
+    # splitting each bill across the months it covers by days (delivery meters from each delivery until the next delivery)
+    # Only the entries newer than the last sync are requested if a consumption store is given
+    consumption_futures = [client.executor.submit(lambda meter: calendarize_entries(sync_consumption(client, consumption_store, meter, full_sync), 
+                                                                                    'Usage'), 
+                                                  meter) 
+                           for meter in energy_meters]
 
-    # Iterate through the energy meters to pull meter information and consumption data
-    for meter in energy_meters:
-        # Using the meter Id, get the information for that meter
-        meter_info = requests.get(domain + f'/meter/{meter}', 
-                                  auth = auth)
+    # Pull the meter information for every energy meter concurrently while the consumption data syncs
+    meter_info_responses = client.get_many([(f'/meter/{meter}', None) for meter in energy_meters])
 
-        # Parse the meter call
-        meter_info_dict = xmltodict.parse(meter_info.content)
+    # Parse the meter calls and look up each meter's conversion factor before processing any consumption,
+    # so an unsupported meter type or unit is reported up front
+    meter_infos = [parse_meter(meter_info.content) for meter_info in meter_info_responses]
+    factors = [conversion_factor(meter_info_dict['type'], meter_info_dict['unitOfMeasure']) for meter_info_dict in meter_infos]
 
+    # Iterate through the energy meters to parse the consumption data
+    for meter, meter_info_dict, factor, consumption_future in zip(energy_meters, meter_infos, factors, consumption_futures):
         # Get the type of meter and the meter name from the meter info to store into a meter descriptor which will be the column name 
-        meter_descriptor = meter_info_dict['meter']['type'] + f" ({standard_units[meter_info_dict['meter']['type']]})" + ' Meter: ' + meter_info_dict['meter']['name'] + f' Id: {meter}'
-
-        # Get consumption data for the energy meter
-        consumption_data = requests.get(domain + f'/meter/{meter}/consumptionData', 
-                                        auth = auth)
-        energy_consumption = xmltodict.parse(consumption_data.content)
-
-        # Create a dataframe from the energy meter consumption
-        energy_data = []
-        # Create a variable to hold the key corresponding to the list of entries for delivery/consumption
-        if 'meterDelivery' in energy_consumption['meterData']:
-            consump_key = 'meterDelivery'
-            delivery_key = 'deliveryDate'
-            amount_key = 'quantity'
-        else:
-            consump_key = 'meterConsumption'
-            delivery_key = 'endDate'
-            amount_key = 'usage'
-
-        # Handle single and multiple entries
-        consumption_entries = energy_consumption['meterData'][consump_key]
-        if isinstance(consumption_entries, dict):
-            consumption_entries = [consumption_entries]
-
-        for entry in consumption_entries:
-            data = {
-                'End Date': pd.to_datetime(entry[delivery_key]),
-                meter_descriptor: VolumeConverter.convert(entry[amount_key], 
-                                                            meter_info_dict['meter']['type'], 
-                                                            meter_info_dict['meter']['unitOfMeasure'], 
-                                                            conversions)
-            }
-            energy_data.append(data)
-
-        # Create the energy dataframe for this meter
-        meter_df = pd.DataFrame(energy_data)
-
-        # Resample to monthly data
-        meter_df.set_index('End Date', inplace=True)
-        meter_df = meter_df.resample('M').sum().reset_index()
-
-        meter_dataframes.append(meter_df)
+        meter_descriptor = meter_info_dict['type'] + f" ({standard_units(meter_info_dict['type'])})" + ' Meter: ' + meter_info_dict['name'] + f' Id: {meter}'
 
-    # Merge all meter dataframes on 'Date'
-    energy_df = pd.DataFrame()
-    for meter_df in meter_dataframes:
-        if energy_df.empty:
-            energy_df = meter_df
-        else:
-            energy_df = pd.merge(energy_df, meter_df, on='End Date', how='outer')
+        # Get the energy meter's calendarized consumption and convert it to the standard units for the meter type
+        meter_df = consumption_future.result()
 
-    # Sort the energy_df by Date and reset the index
-    energy_df.sort_values(by='End Date', ascending=False, inplace=True)
-    energy_df.reset_index(drop=True, inplace=True)
+        meter_series.append(MeterSeries(int(meter), 
+                                        meter_info_dict['type'], 
+                                        standard_units(meter_info_dict['type']), 
+                                        meter_descriptor, 
+                                        meter_df['End Date'], 
+                                        meter_df['Usage'] * factor))
 
-    return energy_df
+    # Store the energy meters' monthly consumption
+    return MeterStore(meter_series)
@@ -1,74 +1,67 @@
 # Import dependencies
-import requests
 import pandas as pd
-import numpy as np
-import xmltodict
 import streamlit as st
+from Utilities.espm_xml import parse_metrics
+from Utilities.annual_metrics import ANNUAL_METRICS_HEADER
+from Utilities.rolling_metrics import rolling_water_metrics
 
-# Define a function to pull the annual metrics for each month for energy and water
-def pull_monthly_metrics(energy_entries, water_entries, domain, auth, prop_id):
-    session = requests.Session()
-    session.auth = auth
+# Set the ESPM metric names and the column names for the monthly energy metrics
+# The water use metrics are calculated locally from the meter consumption (see rolling_metrics)
+ENERGY_METRICS = [
+    ('score', 'Energy Star Score'),
+    ('sourceTotalWN', 'Weather Normalized Source EU (kBtu)'),
+    ('medianSourceTotal', 'National Median Source Energy Use (kBtu)'),
+    ('sourceIntensityWN', 'Weather Normalized Source EUI (kBtu/ft²)'),
+    ('medianSourceIntensity', 'National Median Source EUI (kBtu/ft²)')
+]
 
-    # Combine dates from both dataframes
-    if water_entries is not None:
-        all_entries = set(list(water_entries['End Date']) + list(energy_entries['End Date']))
-    else:
-        all_entries = set(list(energy_entries['End Date']))
+# Define a function to pull the annual metrics for each month with energy meter consumption and calculate the
+# trailing 12 month water use metrics from the meter consumption and gross floor area (prop_sq_ft)
+# Returns a dataframe of the energy metrics and a dataframe of the water metrics (None if there is no water meter),
+# with a row for each month of meter consumption (most recent month first)
+# If the report's year ending and month are given, the five year ending months are pulled with pull_prop_data's annual metrics,
+# so the client's memo serves those months once for both pullers
+def pull_monthly_metrics(energy_meters, water_meters, client, prop_id, prop_sq_ft, max_concurrency = 10, 
+                         year_ending = None, month_ending = None):
 
-    for entry_date in all_entries:
-        year = entry_date.year
-        month = entry_date.month
+    # Get the months with energy meter consumption
+    energy_entries = pd.DataFrame({'End Date' : energy_meters.month_ends()})
 
-        def fetch_metrics(headers):
-            url = f"{domain}/property/{prop_id}/metrics?year={year}&month={month}&measurementSystem=EPA"
-            response = session.get(url, headers=headers)
-            return xmltodict.parse(response.content)
+    # Create the PM-Metrics header for the energy metrics and the call for each month
+    # The year ending months use the annual metrics header (which includes every energy metric)
+    energy_metrics_header = ', '.join(name for name, _ in ENERGY_METRICS)
+    year_ending_months = {(year_ending - i, month_ending) for i in range(5)} if year_ending is not None else set()
+    entry_dates = list(energy_entries['End Date'])
+    calls = [(f"/property/{prop_id}/metrics?year={entry_date.year}&month={entry_date.month}&measurementSystem=EPA", 
+              {'PM-Metrics': ANNUAL_METRICS_HEADER if (entry_date.year, entry_date.month) in year_ending_months 
+                             else energy_metrics_header}) for entry_date in entry_dates]
 
-        def safe_assign(df, date, column, value):
-            df.loc[df['End Date'] == date, column] = value if isinstance(value, str) else np.nan
+    # Make the month calls concurrently - the client rate limits the calls and retries throttled or failed calls
+    responses = client.get_many(calls, max_concurrency = max_concurrency)
 
-        # Determine which type of request is needed
-        if water_entries is None or month not in water_entries['End Date'].dt.month.values:
-            # Only energy
-            metrics_dict = fetch_metrics({'PM-Metrics': 'score, sourceTotalWN, medianSourceTotal, sourceIntensityWN, medianSourceIntensity'})
-            metrics = metrics_dict['propertyMetrics']['metric']
-            safe_assign(energy_entries, entry_date, 'Energy Star Score', metrics[0]['value'])
-            safe_assign(energy_entries, entry_date, 'Weather Normalized Source EU (kBtu)', metrics[1]['value'])
-            safe_assign(energy_entries, entry_date, 'National Median Source Energy Use (kBtu)', metrics[2]['value'])
-            safe_assign(energy_entries, entry_date, 'Weather Normalized Source EUI (kBtu/ft²)', metrics[3]['value'])
-            safe_assign(energy_entries, entry_date, 'National Median Source EUI (kBtu/ft²)', metrics[4]['value'])
+    # Set the columns for the energy metrics
+    energy_cols = [col for _, col in ENERGY_METRICS]
 
-        elif month not in energy_entries['End Date'].dt.month.values:
-            # Only water
-            metrics_dict = fetch_metrics({'PM-Metrics': 'waterIntensityTotal'})
-            value = metrics_dict['propertyMetrics']['metric']['value']
-            safe_assign(water_entries, entry_date, 'Water Use Intensity', value)
+    # Collect each month's metric values into column buffers
+    energy_buffers = {col : [] for col in ['End Date'] + energy_cols}
+    for entry_date, response in zip(entry_dates, responses):
+        # Look up the metric values by name (None if ESPM did not calculate or return the metric)
+        metrics = {metric.name : metric.value for metric in parse_metrics(response.content)}
 
-        else:
-            # Both
-            metrics_dict = fetch_metrics({'PM-Metrics': 'score, sourceTotalWN, medianSourceTotal, sourceIntensityWN, medianSourceIntensity, waterIntensityTotal'})
-            metrics = metrics_dict['propertyMetrics']['metric']
-            safe_assign(energy_entries, entry_date, 'Energy Star Score', metrics[0]['value'])
-            safe_assign(energy_entries, entry_date, 'Weather Normalized Source EU (kBtu)', metrics[1]['value'])
-            safe_assign(energy_entries, entry_date, 'National Median Source Energy Use (kBtu)', metrics[2]['value'])
-            safe_assign(energy_entries, entry_date, 'Weather Normalized Source EUI (kBtu/ft²)', metrics[3]['value'])
-            safe_assign(energy_entries, entry_date, 'National Median Source EUI (kBtu/ft²)', metrics[4]['value'])
-            safe_assign(water_entries, entry_date, 'Water Use Intensity', metrics[5]['value'])
+        energy_buffers['End Date'].append(entry_date)
+        for name, col in ENERGY_METRICS:
+            energy_buffers[col].append(metrics.get(name))
 
-    # Format energy columns
-    energy_cols = [
-        'Energy Star Score',
-        'Weather Normalized Source EU (kBtu)',
-        'National Median Source Energy Use (kBtu)',
-        'Weather Normalized Source EUI (kBtu/ft²)',
-        'National Median Source EUI (kBtu/ft²)'
-    ]
+    # Create the metric dataframe and convert the metric values to numbers once for each column
+    # Metrics that ESPM did not calculate (None) become NaN
+    energy_metrics = pd.DataFrame(energy_buffers, columns = ['End Date'] + energy_cols)
     for col in energy_cols:
-        energy_entries[col] = pd.to_numeric(energy_entries[col], errors='coerce')
+        energy_metrics[col] = pd.to_numeric(energy_metrics[col], errors='coerce')
 
-    if water_entries is not None:
-        water_entries['Water Use Intensity'] = pd.to_numeric(water_entries['Water Use Intensity'], errors='coerce')
+    # Join the ESPM metrics onto the energy dataframe by End Date
+    energy_entries = energy_entries.merge(energy_metrics, on = 'End Date', how = 'left')
 
-    return energy_entries, water_entries
+    # Calculate the water use metrics for each month with water meter consumption
+    water_entries = rolling_water_metrics(water_meters, prop_sq_ft) if water_meters is not None else None
 
+    return energy_entries, water_entries
@@ -0,0 +1,46 @@
+# Import dependencies
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+
+# Create a function to run the report stages on a bounded thread pool
+# stages maps each stage name to a tuple of (function, list of dependency stage names)
+# Each function is called with the results of its dependencies (in the listed order) once they are all ready
+def run_pipeline(stages, max_workers = 4):
+    # Check that every dependency refers to a stage that exists
+    for name, (function, dependencies) in stages.items():
+        for dependency in dependencies:
+            if dependency not in stages:
+                raise ValueError(f"Stage '{name}' depends on unknown stage '{dependency}'.")
+
+    # Create dictionaries to hold the finished results and the futures that are still running
+    results = {}
+    running = {}
+    waiting = dict(stages)
+
+    with ThreadPoolExecutor(max_workers = max_workers) as executor:
+        while waiting or running:
+            # Submit every waiting stage whose dependencies have all finished
+            for name, (function, dependencies) in list(waiting.items()):
+                if all(dependency in results for dependency in dependencies):
+                    future = executor.submit(function, *[results[dependency] for dependency in dependencies])
+                    running[future] = name
+                    del waiting[name]
+
+            # If nothing can be started and nothing is running, the remaining stages depend on each other
+            if not running:
+                raise ValueError(f"Stages have circular dependencies: {', '.join(waiting)}")
+
+            # Wait for at least one running stage to finish and store its result
+            done, _ = wait(running, return_when = FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                # If a stage failed, cancel the stages that have not started and raise the error
+                except Exception:
+                    for pending in running:
+                        pending.cancel()
+                    raise
+
+    # Return the results of every stage keyed by the stage name
+    return results
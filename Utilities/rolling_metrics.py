@@ -0,0 +1,77 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+from Utilities.unit_conversions import WATER_KGAL_FACTORS
+from Utilities.meter_store import month_end_dates
+
+# Set how many months are summed for each trailing metric
+ROLLING_MONTHS = 12
+
+
+# Create a helper function to convert the gross floor area from the about data to a number (NaN if it is missing)
+def floor_area(prop_sq_ft):
+    try:
+        sq_ft = float(prop_sq_ft)
+    except (TypeError, ValueError):
+        return np.nan
+    return sq_ft if sq_ft > 0 else np.nan
+
+
+# Create a helper function to sum the meter values of a store into monthly totals after multiplying each meter by its factors
+# Returns the first month (as months since 1970-01), a (months, factors) array of totals for every month from the first to
+# the last month with values and whether each month has any meter value
+def monthly_totals(store, meter_factors):
+    months = store.data['month'].to_numpy()
+    if len(months) == 0:
+        return 0, np.zeros((0, meter_factors.shape[1])), np.zeros(0, dtype = bool)
+
+    # Look up the factors of each row's meter
+    meter_positions = pd.Index(store.meters['meter_id']).get_indexer(store.data['meter_id'].to_numpy())
+    row_values = store.data['value'].to_numpy(dtype = np.float64)[:, np.newaxis] * meter_factors[meter_positions]
+
+    # Add each row to its month
+    first_month = months.min()
+    month_positions = months - first_month
+    totals = np.zeros((months.max() - first_month + 1, meter_factors.shape[1]))
+    np.add.at(totals, month_positions, row_values)
+    has_data = np.bincount(month_positions, minlength = len(totals)) > 0
+    return first_month, totals, has_data
+
+
+# Create a helper function to sum the trailing months of the monthly totals with cumulative sums
+# A month's sum is NaN unless every month in its window has a meter value (and no NaN total)
+def trailing_sums(totals, has_data, window = ROLLING_MONTHS):
+    # Count the months with a NaN total as months without data, so they do not carry into the later cumulative sums
+    has_data = has_data & ~np.isnan(totals).any(axis = 1)
+    totals = np.where(np.isnan(totals), 0, totals)
+
+    total_sums = np.cumsum(np.vstack([np.zeros((1, totals.shape[1])), totals]), axis = 0)
+    data_counts = np.cumsum(np.concatenate([[0], has_data]))
+    sums = np.full(totals.shape, np.nan)
+    if len(totals) >= window:
+        sums[window - 1:] = total_sums[window:] - total_sums[:-window]
+        sums[window - 1:][data_counts[window:] - data_counts[:-window] < window] = np.nan
+    return sums
+
+
+# Create a helper function to return the trailing sums for each month the store has values (most recent month first)
+def store_months(store, first_month, sums):
+    months = np.unique(store.data['month'].to_numpy())[::-1]
+    return month_end_dates(months), sums[months - first_month]
+
+
+# Create a function to calculate the trailing 12 month water use (kgal) and water use intensity (gal/ft²) from the water meters
+# Meters with units that cannot be converted to kgal make the months they have values for NaN, like ESPM's N/A
+# Returns a dataframe with a row for each month of meter consumption (most recent month first)
+def rolling_water_metrics(water_meters, prop_sq_ft):
+    # Get the kgal of one unit of each meter
+    meter_factors = np.array([[WATER_KGAL_FACTORS.get(unit, np.nan)] for unit in water_meters.meters['unit'].astype(str)],
+                             dtype = np.float64).reshape(-1, 1)
+
+    first_month, totals, has_data = monthly_totals(water_meters, meter_factors)
+    end_dates, sums = store_months(water_meters, first_month, trailing_sums(totals, has_data))
+
+    sq_ft = floor_area(prop_sq_ft)
+    return pd.DataFrame({'End Date' : end_dates,
+                         'Water Use (kgal)' : sums[:, 0],
+                         'Water Use Intensity' : sums[:, 0] * 1000 / sq_ft})
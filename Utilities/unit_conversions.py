@@ -0,0 +1,119 @@
+# Import dependencies
+import numpy as np
+
+# Create a conversions table to standardize the meter data before plotting it
+# Each meter type maps the units ESPM reports to the factor that converts them to the meter type's standard units
+CONVERSIONS = {
+    'Electric': {
+        'kWh (thousand Watt-hours)' : 1,
+        '(kBtu (thousand Btu))' : 0.293071,
+        'kBtu (thousand Btu)' : 0.293071
+    },
+    'Electric on Site Solar' : {
+        '(kWh (thousand Watt-hours))' : -1,
+        'kWh (thousand Watt-hours)' : -1,
+        '(MWh (million Watt-hours))' : -1000,
+        'MWh (million Watt-hours)' : -1000
+    },
+    'Natural Gas': {
+        'therms' : 1,
+        '(kBtu (thousand Btu))' : 0.010002388,
+        'kBtu (thousand Btu)' : 0.010002388,
+        '(MBtu (million Btu))' : 10.002388,
+        'MBtu (million Btu)' : 10.002388,
+        'ccf (hundred cubic feet)' : 1.037
+    },
+    'Propane': {
+        'cf (cubic feet)' : 0.02565826330532213,
+        'Gallons (US)' : 0.916
+    },
+    'Municipally Supplied Potable Water - Indoor': {
+        'ccf (hundred cubic feet)' : 0.748052,
+        'KGal (thousand gallons) (US)' : 1
+    },
+    'Municipally Supplied Potable Water - Outdoor': {
+        'ccf (hundred cubic feet)' : 0.748052,
+        'KGal (thousand gallons) (US)' : 1
+    },
+    'Municipally Supplied Potable Water - Mixed Indoor/Outdoor': {
+        'ccf (hundred cubic feet)' : 0.748052,
+        '(cf (cubic feet))' : 0.00748052,
+        'cf (cubic feet)' : 0.00748052,
+        'Gallons (US)' : 1,
+        'cGal (hundred gallons) (US)' : .1,
+        'kcf (thousand cubic feet)' : 7.48052,
+        'KGal (thousand gallons) (US)' : 1
+    },
+    'Municipally Supplied Reclaimed Water - Outdoor' : {
+        '(ccf (hundred cubic feet))' : 0.748052,
+        'ccf (hundred cubic feet)' : 0.748052,
+        'KGal (thousand gallons) (US)' : 1
+    },
+    'Municipally Supplied Reclaimed Water - Mixed Indoor/Outdoor' : {
+        '(ccf (hundred cubic feet))' : 0.748052,
+        'ccf (hundred cubic feet)' : 0.748052,
+        'KGal (thousand gallons) (US)' : 1
+    }
+}
+
+# Create a dictionary to hold the mappings for the standard units for each meter type
+STANDARD_UNITS = {
+    'Electric': 'kWh',
+    'Electric on Site Solar' : 'kWh',
+    'Municipally Supplied Potable Water - Indoor': 'Gallons',
+    'Municipally Supplied Reclaimed Water - Mixed Indoor/Outdoor': 'Gallons',
+    'Municipally Supplied Potable Water - Outdoor': 'Gallons',
+    'Municipally Supplied Potable Water - Mixed Indoor/Outdoor': 'Gallons',
+    'Natural Gas': 'therms',
+    'Propane': 'therms'
+}
+
+# Create a dictionary to hold the kgal of one unit of water for each water meter unit ESPM reports
+# Used for the trailing water use, as the water conversions above are not all in kgal (i.e. Gallons (US))
+WATER_KGAL_FACTORS = {
+    'ccf (hundred cubic feet)' : 0.748052,
+    '(ccf (hundred cubic feet))' : 0.748052,
+    'cf (cubic feet)' : 0.00748052,
+    '(cf (cubic feet))' : 0.00748052,
+    'kcf (thousand cubic feet)' : 7.48052,
+    'Gallons (US)' : 0.001,
+    'cGal (hundred gallons) (US)' : 0.1,
+    'KGal (thousand gallons) (US)' : 1,
+    'MGal (million gallons) (US)' : 1000
+}
+
+# Create a dictionary to hold the site energy (kBtu) of one standard unit for the meter types included in ESPM's
+# monthly site electricity and natural gas use, and the kBtu column each meter type is added to
+# The on site solar factor is negative because its standard units are stored as negative kWh
+SITE_KBTU_FACTORS = {
+    'Electric': ('Electric kBtu', 3.412),
+    'Electric on Site Solar': ('Electric kBtu', -3.412),
+    'Natural Gas': ('Gas kBtu', 100)
+}
+
+# Compile the conversions table once into a flat lookup of (meter type, units) -> conversion factor
+_FACTORS = {(meter_type, units) : np.float64(factor)
+            for meter_type, unit_factors in CONVERSIONS.items()
+            for units, factor in unit_factors.items()}
+
+
+# Create a function to get the standard units for a meter type
+def standard_units(meter_type):
+    try:
+        return STANDARD_UNITS[meter_type]
+    except KeyError:
+        raise ValueError(f"Unsupported meter type '{meter_type}'. "
+                         f"Supported meter types are: {', '.join(STANDARD_UNITS)}.") from None
+
+
+# Create a function to get the factor that converts a meter type's units to its standard units
+def conversion_factor(meter_type, units):
+    try:
+        return _FACTORS[(meter_type, units)]
+    except KeyError:
+        if meter_type not in CONVERSIONS:
+            raise ValueError(f"Unsupported meter type '{meter_type}'. "
+                             f"Supported meter types are: {', '.join(CONVERSIONS)}.") from None
+        raise ValueError(f"Unsupported units '{units}' for {meter_type} meters. "
+                         f"Supported units are: {', '.join(CONVERSIONS[meter_type])}.") from None
+
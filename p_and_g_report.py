@@ -1,12 +1,20 @@
 # Import dependencies
 import streamlit as st
+import time
 from base64 import b64encode
+from Utilities.espm_client import ESPMClient
+from Utilities.espm_cache import ESPMResponseCache
+from Utilities.consumption_store import ConsumptionStore
 from Utilities.get_about_data import get_about_data
 from Utilities.pull_prop_data import pull_prop_data
 from Utilities.pull_water_consumption import pull_water_consumption
 from Utilities.pull_monthly_energy import pull_monthly_energy
 from Utilities.generate_pdf import generate_pdf
 from Utilities.pull_monthly_metrics import pull_monthly_metrics
+from Utilities.monthly_kbtu import derive_monthly_kbtu, reconcile_monthly_kbtu
+from Utilities.report_pipeline import run_pipeline
+from Utilities.chart_render import get_render_service
+from Utilities.chart_cache import ChartCache
 from Utilities.plot_metrics import (graph_eu, graph_hcf, graph_es_score, 
                             graph_seui, graph_e_meters_overlay, 
                             graph_g_meters_overlay)
@@ -18,6 +26,26 @@ st.markdown("<h2 style = 'text-align: center; color: black;'>Progress and Goals
 # Set the domain for the API calls
 domain = 'https://portfoliomanager.energystar.gov/ws'
 
+# Open the on-disk ESPM response cache once and share it across reports
+@st.cache_resource
+def get_response_cache():
+    return ESPMResponseCache()
+
+# Open the local meter consumption store once so each report only syncs the new consumption entries
+@st.cache_resource
+def get_consumption_store():
+    return ConsumptionStore()
+
+# Start the chart render service once when the app loads, so kaleido is warm before the first report
+@st.cache_resource
+def get_chart_renderer():
+    return get_render_service()
+
+# Create the chart cache once and share it across reports, so unchanged charts are not rebuilt or rendered again
+@st.cache_resource
+def get_chart_cache():
+    return ChartCache()
+
 # Initialize session state for credentials if not already set
 if "auth" not in st.session_state:
     # Load credentials for the API calls into the auth variable
@@ -81,6 +109,35 @@ if reissued_check:
 else:
     reissued_date = None
 
+# Add a checkbox to skip reading cached ESPM responses and pull everything fresh from ESPM
+bypass_cache = st.checkbox(label = 'Bypass the ESPM response cache.', 
+                           value = False, 
+                           help = ' '.join(['Pull every response and the full meter consumption history fresh from ESPM', 
+                                            'instead of using the data saved from previous reports.']))
+
+# Add a selectbox to choose where the monthly electric and gas kBtu consumption comes from
+kbtu_source = st.selectbox('Select the monthly kBtu source', 
+                           options = ['ESPM API', 'Meter data', 'Meter data (validate against ESPM)'])
+st.caption('ESPM API pulls the monthly electric and gas kBtu from ESPM.<br>' + 
+           'Meter data calculates it from the meter consumption with site energy conversion factors, saving five API calls.<br>' + 
+           'Validate also pulls it from ESPM and shows any months where the two differ by more than 1%.', 
+           unsafe_allow_html = True)
+
+# Add a selectbox to choose how the charts are added to the PDF
+chart_formats = {'PNG images' : 'png', 'Drawn in the PDF' : 'native'}
+chart_format = st.selectbox('Select how the PDF charts are created', 
+                            options = list(chart_formats))
+st.caption('PNG images are rendered from the plotly charts.<br>' + 
+           'Drawn in the PDF draws the charts straight onto the PDF without a browser, the fastest option.', 
+           unsafe_allow_html = True)
+
+# Start the render service unless the charts are drawn in the PDF
+# Streamlit reruns the script when the selection changes, so kaleido is warm before the first report with images
+if chart_formats[chart_format] != 'native':
+    render_service = get_chart_renderer()
+else:
+    render_service = None
+
 # Create a button to generate the report
 if st.button('Generate Progress and Goals Report'):
     with st.spinner('Generating Progress and Goals Report'):
@@ -92,36 +149,80 @@ if st.button('Generate Progress and Goals Report'):
             month_select is not None) and (
             prop_id != 123456789):
 
-            with st.spinner("Pulling property information data."):
-                # Pull the about data
-                about_data = get_about_data(prop_id, domain, auth)
-
-            with st.spinner('Pulling annual metrics and monthly kBtu data.'):
-                # Pull the property data
-                (ann_metrics, 
-                monthly_kbtu) = pull_prop_data(prop_id, 
-                                                        year_ending, 
-                                                        month_ending, 
-                                                        domain, 
-                                                        auth)
-
-            with st.spinner('Pulling monthly water consumption.'):
-                # Pull the water dataframe
-                water_df = pull_water_consumption(prop_id, domain, auth)
-
-            with st.spinner('Pulling monthly gas and electricity consumption.'):
-                # Pull the energy dataframe
-                monthly_energy = pull_monthly_energy(prop_id, domain, auth)
-
-            with st.spinner('Pulling annual metrics.'):
-                # Pull the annual metrics and add them to the energy and water dfs
-                monthly_energy, water_df = pull_monthly_metrics(monthly_energy, water_df, domain, auth, prop_id)
+            # Get the local meter consumption store
+            consumption_store = get_consumption_store()
+
+            # Create one pooled ESPM client to be shared by every API call for this report
+            with ESPMClient(auth, domain, 
+                            cache = get_response_cache(), 
+                            bypass_cache = bypass_cache) as client:
+                with st.spinner('Pulling property information, metrics and meter consumption.'):
+                    # Run the independent pullers at the same time, and pull the monthly metrics
+                    # as soon as the energy and water meters and the property's floor area are ready
+                    results = run_pipeline({
+                        'about_data' : (lambda: get_about_data(prop_id, client), []),
+                        'prop_data' : (lambda: pull_prop_data(prop_id, 
+                                                              year_ending, 
+                                                              month_ending, 
+                                                              client, 
+                                                              pull_monthly_kbtu = kbtu_source != 'Meter data'), []),
+                        'water_meters' : (lambda: pull_water_consumption(prop_id, 
+                                                                         client, 
+                                                                         consumption_store, 
+                                                                         full_sync = bypass_cache), []),
+                        'energy_meters' : (lambda: pull_monthly_energy(prop_id, 
+                                                                       client, 
+                                                                       consumption_store, 
+                                                                       full_sync = bypass_cache), []),
+                        'monthly_metrics' : (lambda energy_meters, water_meters, about_data: pull_monthly_metrics(energy_meters, 
+                                                                                                                  water_meters, 
+                                                                                                                  client, 
+                                                                                                                  prop_id, 
+                                                                                                                  about_data['prop_sq_ft'], 
+                                                                                                                  year_ending = year_ending, 
+                                                                                                                  month_ending = month_ending), 
+                                             ['energy_meters', 'water_meters', 'about_data']),
+                        'monthly_kbtu' : (lambda energy_meters, prop_data: (prop_data[1] if kbtu_source == 'ESPM API' 
+                                                                            else derive_monthly_kbtu(energy_meters, year_ending)), 
+                                          ['energy_meters', 'prop_data'])
+                    })
+
+                # Unpack the results of the pipeline stages
+                about_data = results['about_data']
+                ann_metrics, api_kbtu = results['prop_data']
+                monthly_kbtu = results['monthly_kbtu']
+                energy_meters = results['energy_meters']
+                water_meters = results['water_meters']
+                monthly_energy, water_df = results['monthly_metrics']
+
+                # Report how many duplicate ESPM calls were served from the run's memo
+                st.caption(f'Made {client.calls_made} ESPM API calls ({client.calls_saved} duplicate calls served from memory, ' + 
+                           f'{client.cache_hits} served from the response cache).')
+
+                # Compare the kBtu consumption calculated from the meter data to ESPM's in the validation mode
+                if kbtu_source == 'Meter data (validate against ESPM)':
+                    kbtu_mismatches = reconcile_monthly_kbtu(monthly_kbtu, api_kbtu)
+                    if kbtu_mismatches.empty:
+                        st.caption('The monthly kBtu calculated from the meter data matches ESPM within 1% for every month.')
+                    else:
+                        st.warning(f'The monthly kBtu calculated from the meter data differs from ESPM by more than 1% for {len(kbtu_mismatches)} months.')
+                        st.dataframe(kbtu_mismatches)
 
             with st.spinner('Generating Progress and Goals PDF.'):
                 # Generate the progress and goals report
+                pdf_start = time.time()
                 p_and_g_report = generate_pdf(about_data, ann_metrics, prop_id, 
                                               year_ending, monthly_kbtu, water_df, 
-                                              monthly_energy, reissued_check, reissued_date)
+                                              monthly_energy, energy_meters, water_meters, 
+                                              reissued_check, reissued_date, 
+                                              chart_cache = get_chart_cache(), 
+                                              chart_format = chart_formats[chart_format])
+
+                # Report how long the charts waited for a render worker
+                render_waits = render_service.waits_since(pdf_start) if render_service is not None else []
+                if render_waits:
+                    st.caption(f'Rendered {len(render_waits)} charts (longest queue wait {max(render_waits):.2f} s, ' + 
+                               f'{render_service.restarts} renderer restarts).')
 
             # Add a button to download the Progress and Goals report
             st.download_button(
@@ -131,13 +232,14 @@ if st.button('Generate Progress and Goals Report'):
                 mime="application/pdf"
             )
             st.caption(f"Click to download the Progress and Goals report for {about_data['prop_address']}")
-            # Display the plotly graphs on the streamlit app
-            st.write(graph_eu(monthly_kbtu, about_data['prop_address']))
-            st.write(graph_hcf(water_df, about_data['prop_address']))
+            # Display the plotly graphs on the streamlit app, reusing the figures built for the PDF
+            chart_cache = get_chart_cache()
+            st.write(chart_cache.chart(graph_eu, monthly_kbtu, about_data['prop_address']).figure)
+            st.write(chart_cache.chart(graph_hcf, water_meters, about_data['prop_address']).figure)
             # st.write(graph_es_score(monthly_energy.loc[monthly_energy['End Date'] >= earliest_full_data(monthly_kbtu)]))
             # st.write(graph_seui(monthly_energy.loc[monthly_energy['End Date'] >= earliest_full_data(monthly_kbtu)]))
-            st.write(graph_e_meters_overlay(monthly_energy))
-            st.write(graph_g_meters_overlay(monthly_energy))
+            st.write(chart_cache.chart(graph_e_meters_overlay, energy_meters).figure)
+            st.write(chart_cache.chart(graph_g_meters_overlay, energy_meters).figure)
 
             
                         
@@ -0,0 +1,12 @@
+# Import dependencies
+from Utilities.annual_metrics import AnnualMetrics
+from Utilities.espm_xml import Metric
+
+
+def test_format_shows_the_espm_values():
+    # Values are shown as ESPM returned them (78, not 78.0), scores as whole numbers and missing values as N/A
+    metrics = AnnualMetrics.from_metrics(['2024-12-31', '2023-12-31'],
+                                         [[Metric('score', None, '81'), Metric('sourceIntensityWN', 'kBtu/ft²', '78')],
+                                          [Metric('sourceIntensityWN', 'kBtu/ft²', '123456.7')]])
+    assert [metrics.format('sourceIntensityWN', i) for i in range(len(metrics))] == ['123456.7', '78']
+    assert [metrics.format('score', i) for i in range(len(metrics))] == ['N/A', '81']
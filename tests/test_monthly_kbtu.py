@@ -0,0 +1,34 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+from Utilities.meter_store import MeterSeries, MeterStore
+from Utilities.monthly_kbtu import derive_monthly_kbtu
+from Utilities.unit_conversions import SITE_KBTU_FACTORS, conversion_factor
+
+
+# Create a helper function to build an energy meter store with the same consumption every month of 2023
+# The consumption is converted to the meter type's standard units, like pull_monthly_energy does
+def energy_store(meter_type, unit, usage):
+    end_dates = pd.Series(pd.date_range('2023-01-31', periods = 12, freq = 'M'))
+    values = pd.Series([usage] * 12, dtype = float) * conversion_factor(meter_type, unit)
+    return MeterStore([MeterSeries(1, meter_type, unit, 'Meter', end_dates, values)])
+
+
+def test_known_energy_units():
+    # The site kBtu of one billed unit (solar is stored as negative kWh with a negative site factor, so it adds kBtu)
+    for meter_type, unit, kbtu in [('Electric', 'kBtu (thousand Btu)', 1),
+                                   ('Electric', '(kBtu (thousand Btu))', 1),
+                                   ('Electric', 'kWh (thousand Watt-hours)', 3.412),
+                                   ('Electric on Site Solar', 'MWh (million Watt-hours)', 3412),
+                                   ('Electric on Site Solar', '(MWh (million Watt-hours))', 3412),
+                                   ('Electric on Site Solar', 'kWh (thousand Watt-hours)', 3.412),
+                                   ('Natural Gas', 'kBtu (thousand Btu)', 1),
+                                   ('Natural Gas', 'MBtu (million Btu)', 1000),
+                                   ('Natural Gas', 'therms', 100)]:
+        assert np.isclose(conversion_factor(meter_type, unit) * SITE_KBTU_FACTORS[meter_type][1], kbtu, rtol = 1e-3)
+
+
+def test_kbtu_billed_electric_meter():
+    # An electric meter billed 1,000 kBtu a month is 1,000 kBtu a month
+    monthly_kbtu = derive_monthly_kbtu(energy_store('Electric', 'kBtu (thousand Btu)', 1000), 2023)
+    assert np.allclose(monthly_kbtu['Electric kBtu'], 1000, rtol = 1e-3)
@@ -0,0 +1,31 @@
+# Import dependencies
+import numpy as np
+import pandas as pd
+from Utilities.meter_store import MeterSeries, MeterStore
+from Utilities.rolling_metrics import rolling_water_metrics
+
+
+# Create a helper function to build a water meter store with the same consumption every month of 2023
+def water_store(unit, usage):
+    end_dates = pd.Series(pd.date_range('2023-01-31', periods = 12, freq = 'M'))
+    return MeterStore([MeterSeries(1, 'Municipally Supplied Potable Water - Mixed Indoor/Outdoor', unit, 'Usage (HCF)',
+                                   end_dates, pd.Series([usage] * 12, dtype = float))])
+
+
+def test_gallon_meters_are_converted_to_kgal():
+    # 1,000 gallons a month is 12 kgal a year, or 12 gal/ft² for 1,000 ft²
+    metrics = rolling_water_metrics(water_store('Gallons (US)', 1000), 1000)
+    assert np.isclose(metrics['Water Use (kgal)'].iloc[0], 12)
+    assert np.isclose(metrics['Water Use Intensity'].iloc[0], 12)
+
+
+def test_known_water_units():
+    for unit, usage, kgal in [('ccf (hundred cubic feet)', 100, 12 * 74.8052),
+                              ('cGal (hundred gallons) (US)', 10, 12),
+                              ('KGal (thousand gallons) (US)', 1, 12),
+                              ('kcf (thousand cubic feet)', 1, 12 * 7.48052)]:
+        assert np.isclose(rolling_water_metrics(water_store(unit, usage), 1000)['Water Use (kgal)'].iloc[0], kgal)
+
+
+def test_unknown_units_are_nan():
+    assert rolling_water_metrics(water_store('Liters', 1000), 1000)['Water Use (kgal)'].isna().all()